@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import contextlib
+
+from benchmarks.suite import (
+    ALGORITHMS,
+    BACKEND_MEMORY,
+    BACKEND_REDIS,
+    LocalRedisServer,
+    build_scenarios,
+    dump,
+    run_suite,
+)
+
+
+def str_to_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def parse_args(args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measure throughput and admission latency of client_throttler",
+    )
+    parser.add_argument(
+        "--backend", choices=[BACKEND_MEMORY, BACKEND_REDIS], default=BACKEND_MEMORY
+    )
+    parser.add_argument("--redis-url", default="redis://127.0.0.1:6379/0")
+    parser.add_argument(
+        "--spawn-redis",
+        action="store_true",
+        help="start a throwaway redis-server and benchmark against it",
+    )
+    parser.add_argument("--calls", type=int, default=10000, help="calls per scenario")
+    parser.add_argument(
+        "--rate", default="1000000/s", help="rate limit of the benchmark key"
+    )
+    parser.add_argument(
+        "--algorithms", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS)
+    )
+    parser.add_argument(
+        "--pipeline", nargs="+", type=str_to_bool, default=[True, False]
+    )
+    parser.add_argument("--metrics", nargs="+", type=str_to_bool, default=[False, True])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--processes", nargs="+", type=int, default=[1])
+    parser.add_argument(
+        "--import-runs",
+        type=int,
+        default=5,
+        help="fresh interpreters timing each package import, 0 to skip",
+    )
+    parser.add_argument(
+        "--output", help="write the JSON report to this file instead of stdout"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None) -> None:
+    args = parse_args(args)
+    scenarios = build_scenarios(
+        args.algorithms, args.pipeline, args.metrics, args.threads, args.processes
+    )
+    with contextlib.ExitStack() as stack:
+        if args.spawn_redis:
+            args.backend = BACKEND_REDIS
+            args.redis_url = stack.enter_context(LocalRedisServer()).url
+        report = run_suite(
+            scenarios,
+            backend=args.backend,
+            calls=args.calls,
+            rate=args.rate,
+            redis_url=args.redis_url,
+            import_runs=args.import_runs,
+        )
+    dump(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
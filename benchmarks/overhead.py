@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List
+
+from benchmarks.suite import dump
+from client_throttler import Throttler, ThrottlerConfig, throttler
+
+
+class NullPipeline:
+    """
+    Pipeline answering every command with a canned result at once, so that only the library's cost is measured
+    """
+
+    def __init__(self):
+        self._results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        return
+
+    def zremrangebyscore(self, *args, **kwargs):
+        self._results.append(0)
+
+    def zremrangebyrank(self, *args, **kwargs):
+        self._results.append(0)
+
+    def zadd(self, *args, **kwargs):
+        self._results.append(1)
+
+    def zrem(self, *args, **kwargs):
+        self._results.append(1)
+
+    def zcard(self, *args, **kwargs):
+        self._results.append(1)
+
+    def zcount(self, *args, **kwargs):
+        self._results.append(1)
+
+    def zrangebyscore(self, *args, **kwargs):
+        self._results.append([])
+
+    def expire(self, *args, **kwargs):
+        self._results.append(True)
+
+    def execute(self, raise_on_error: bool = True) -> list:
+        results, self._results = self._results, []
+        return results
+
+
+class NullRedisClient(NullPipeline):
+    """
+    Redis client admitting every request with no I/O
+    """
+
+    def __init__(self):
+        super().__init__()
+        del self._results
+
+    def pipeline(self, transaction: bool = True) -> NullPipeline:
+        return NullPipeline()
+
+    def zremrangebyscore(self, *args, **kwargs):
+        return 0
+
+    def zremrangebyrank(self, *args, **kwargs):
+        return 0
+
+    def zadd(self, *args, **kwargs):
+        return 1
+
+    def zrem(self, *args, **kwargs):
+        return 1
+
+    def zcard(self, *args, **kwargs):
+        return 1
+
+    def zcount(self, *args, **kwargs):
+        return 1
+
+    def zrangebyscore(self, *args, **kwargs):
+        return []
+
+    def expire(self, *args, **kwargs):
+        return True
+
+
+def noop() -> None:
+    return
+
+
+@dataclass
+class OverheadResult:
+    """
+    CPU cost of one call path, in microseconds per call
+    """
+
+    path: str
+    calls: int
+    us_per_call: float
+    max_us_per_call: float
+    passed: bool
+
+
+def build_paths() -> Dict[str, Callable[[], None]]:
+    """
+    Call paths under measurement, every path runs against a NullRedisClient
+    """
+
+    config = ThrottlerConfig(
+        rate="1000000000/s", key="overhead", redis_client=NullRedisClient()
+    )
+    instance = Throttler(config.copy(func=noop))
+    no_pipeline = Throttler(config.copy(func=noop, enable_pipeline=False))
+    return {
+        "decorator": throttler(config)(noop),
+        "throttler": instance,
+        "try_acquire": instance.try_acquire,
+        "no_pipeline": no_pipeline,
+    }
+
+
+def measure(func: Callable[[], None], calls: int, repeat: int) -> float:
+    """
+    Best CPU time per call (microseconds) over repeat rounds of calls
+    """
+
+    func()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(calls):
+            func()
+        best = min(best, time.process_time() - start)
+    return best / calls * 1e6
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    """
+    Cost per call of each path in a report written by an earlier run
+    """
+
+    with open(path) as f:
+        report = json.load(f)
+    return {result["path"]: result["us_per_call"] for result in report["results"]}
+
+
+def run_overhead(
+    calls: int = 20000,
+    repeat: int = 5,
+    max_us: float = 30,
+    baseline: Dict[str, float] = None,
+    max_ratio: float = 1.5,
+) -> List[OverheadResult]:
+    """
+    Measure every call path, a path fails above max_us,
+    or above max_ratio times its cost in the baseline when one is given
+    """
+
+    results = []
+    for path, func in build_paths().items():
+        limit = max_us
+        if baseline and path in baseline:
+            limit = min(limit, baseline[path] * max_ratio)
+        us_per_call = measure(func, calls, repeat)
+        results.append(
+            OverheadResult(
+                path=path,
+                calls=calls,
+                us_per_call=us_per_call,
+                max_us_per_call=limit,
+                passed=us_per_call <= limit,
+            )
+        )
+    return results
+
+
+def parse_args(args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.overhead",
+        description="Measure the CPU cost per call of client_throttler without backend",
+    )
+    parser.add_argument("--calls", type=int, default=20000, help="calls per round")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="rounds, the best is kept"
+    )
+    parser.add_argument(
+        "--max-us",
+        type=float,
+        default=30,
+        help="fail when a call path costs more microseconds per call",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="JSON report of an earlier run on the same host, to fail on regressions relative to it",
+    )
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=1.5,
+        help="fail when a call path costs more than this times its baseline",
+    )
+    parser.add_argument(
+        "--output", help="write the JSON report to this file instead of stdout"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None) -> None:
+    args = parse_args(args)
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    results = run_overhead(
+        args.calls, args.repeat, args.max_us, baseline, args.max_ratio
+    )
+    dump({"results": [asdict(result) for result in results]}, args.output)
+    failed = [
+        f"{result.path} ({result.us_per_call:.1f}us > {result.max_us_per_call:.1f}us)"
+        for result in results
+        if not result.passed
+    ]
+    if failed:
+        sys.exit(f"per-call overhead above budget: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
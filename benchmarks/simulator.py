@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import bisect
+import heapq
+import itertools
+import random
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Sequence
+
+from benchmarks.suite import ALGORITHMS, BACKEND_MEMORY, BACKEND_REDIS, dump, percentile
+from client_throttler import Throttler, ThrottlerConfig
+from client_throttler.clock import SimulatedClock
+from client_throttler.memory import InMemoryRedisClient
+
+
+def poisson_arrivals(
+    arrival_rate: float, duration: float, seed: int = 0
+) -> List[float]:
+    """
+    Arrival times (seconds) of a Poisson process of arrival_rate requests per second
+    """
+
+    generator = random.Random(seed)
+    arrivals, now = [], generator.expovariate(arrival_rate)
+    while now < duration:
+        arrivals.append(now)
+        now += generator.expovariate(arrival_rate)
+    return arrivals
+
+
+def burst_arrivals(bursts: Sequence[tuple]) -> List[float]:
+    """
+    Arrival times of bursts given as (time, count) pairs, every request of a burst arrives at once
+    """
+
+    return sorted(itertools.chain.from_iterable([at] * count for at, count in bursts))
+
+
+def load_trace(path: str) -> List[float]:
+    """
+    Arrival times recorded one per line, in seconds, shifted to start at 0
+    """
+
+    with open(path) as f:
+        arrivals = sorted(float(line) for line in f if line.strip())
+    return [arrival - arrivals[0] for arrival in arrivals] if arrivals else []
+
+
+class CountingPipeline:
+    """
+    Pipeline counting queued commands, one round trip per execute
+    """
+
+    def __init__(self, client: "CountingClient", pipeline):
+        self._client = client
+        self._pipeline = pipeline
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        return
+
+    def __getattr__(self, name: str):
+        self._client.commands[name] += 1
+        return getattr(self._pipeline, name)
+
+    def execute(self, *args, **kwargs) -> list:
+        self._client.round_trips += 1
+        return self._pipeline.execute(*args, **kwargs)
+
+
+class CountingClient:
+    """
+    Redis client proxy counting commands and round trips
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.commands = Counter()
+        self.round_trips = 0
+
+    def pipeline(self, transaction: bool = True) -> CountingPipeline:
+        return CountingPipeline(self, self._client.pipeline(transaction=transaction))
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def command(*args, **kwargs):
+            self.commands[name] += 1
+            self.round_trips += 1
+            return attr(*args, **kwargs)
+
+        return command
+
+
+@dataclass
+class SimulationResult:
+    """
+    Outcome of replaying arrivals in virtual time, waits are in seconds
+    """
+
+    algorithm: str
+    rate: str
+    arrivals: int
+    admitted: int
+    dropped: int
+    duration: float
+    admitted_rate: float
+    max_interval_admissions: int
+    wait_p50: float
+    wait_p99: float
+    wait_max: float
+    round_trips: int
+    commands: Dict[str, int] = field(default_factory=dict)
+
+
+def max_interval_admissions(admitted: List[float], interval: float) -> int:
+    """
+    Most admissions within any window of interval seconds
+    """
+
+    return max(
+        (
+            index - bisect.bisect_right(admitted, at - interval) + 1
+            for index, at in enumerate(admitted)
+        ),
+        default=0,
+    )
+
+
+def simulate(
+    arrivals: Sequence[float],
+    rate: str,
+    algorithm: str = "sliding_window",
+    backend: str = BACKEND_MEMORY,
+    redis_url: str = None,
+    max_wait: float = None,
+    latency: float = 0.001,
+) -> SimulationResult:
+    """
+    Replay arrivals against a throttler in virtual time. A rejected request retries after the wait time
+    of the throttler plus the latency of the attempt, as a sleeping caller would,
+    and is dropped once it waited more than max_wait.
+    :param arrivals: Sorted arrival times (seconds)
+    :param rate: Rate of the throttler
+    :param algorithm: Config overrides of ALGORITHMS
+    :param backend: memory backend in virtual time, or redis
+    :param max_wait: Max seconds a request waits for a permit, unbounded if not set
+    :param latency: Virtual seconds an admission attempt takes (the redis round trip),
+        callers waiting half of the retry-after would never reach it without
+    """
+
+    clock = SimulatedClock()
+    if backend == BACKEND_MEMORY:
+        backend_client = InMemoryRedisClient(
+            clock=clock.monotonic, wall_clock=clock.time
+        )
+    elif backend == BACKEND_REDIS:
+        from redis import Redis
+
+        backend_client = Redis.from_url(redis_url)
+    else:
+        raise ValueError(f"Invalid backend: {backend}")
+    redis_client = CountingClient(backend_client)
+    throttler = Throttler(
+        ThrottlerConfig(
+            func=lambda: None,
+            rate=rate,
+            key_prefix="simulation",
+            key=uuid.uuid4().hex,
+            redis_client=redis_client,
+            clock=clock,
+            **ALGORITHMS[algorithm],
+        )
+    )
+
+    # events are (virtual time, sequence, arrival time)
+    events = [(at, index, at) for index, at in enumerate(arrivals)]
+    heapq.heapify(events)
+    sequence = itertools.count(len(events))
+    admitted, waits, dropped = [], [], 0
+    try:
+        while events:
+            now, _, arrived_at = heapq.heappop(events)
+            clock.move_to(now)
+            result = throttler.try_acquire()
+            if result.allowed:
+                admitted.append(clock.monotonic())
+                waits.append(clock.monotonic() - arrived_at)
+                continue
+            retry_at = (
+                clock.monotonic() + latency + throttler.to_wait_time(result.retry_after)
+            )
+            if max_wait is not None and retry_at - arrived_at > max_wait:
+                dropped += 1
+                continue
+            heapq.heappush(events, (retry_at, next(sequence), arrived_at))
+    finally:
+        if backend == BACKEND_REDIS:
+            backend_client.delete(throttler.config.cache_key)
+
+    waits.sort()
+    duration = clock.monotonic()
+    return SimulationResult(
+        algorithm=algorithm,
+        rate=rate,
+        arrivals=len(arrivals),
+        admitted=len(admitted),
+        dropped=dropped,
+        duration=duration,
+        admitted_rate=len(admitted) / duration if duration else 0.0,
+        max_interval_admissions=max_interval_admissions(
+            admitted, throttler.config.interval
+        ),
+        wait_p50=percentile(waits, 50),
+        wait_p99=percentile(waits, 99),
+        wait_max=waits[-1] if waits else 0.0,
+        round_trips=redis_client.round_trips,
+        commands=dict(redis_client.commands),
+    )
+
+
+def parse_args(args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.simulator",
+        description="Replay arrivals against client_throttler in virtual time",
+    )
+    parser.add_argument("--rate", default="100/s", help="rate limit under test")
+    parser.add_argument(
+        "--algorithms", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS)
+    )
+    parser.add_argument(
+        "--backend", choices=[BACKEND_MEMORY, BACKEND_REDIS], default=BACKEND_MEMORY
+    )
+    parser.add_argument("--redis-url", default="redis://127.0.0.1:6379/0")
+    parser.add_argument(
+        "--arrival-rate", type=float, default=90, help="Poisson arrivals per second"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=60, help="seconds of Poisson arrivals"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace", help="replay arrival times read from this file")
+    parser.add_argument("--max-wait", type=float, help="drop requests waiting longer")
+    parser.add_argument(
+        "--latency", type=float, default=0.001, help="seconds per admission attempt"
+    )
+    parser.add_argument(
+        "--output", help="write the JSON report to this file instead of stdout"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None) -> None:
+    args = parse_args(args)
+    if args.trace:
+        arrivals = load_trace(args.trace)
+    else:
+        arrivals = poisson_arrivals(args.arrival_rate, args.duration, args.seed)
+    results = [
+        asdict(
+            simulate(
+                arrivals,
+                args.rate,
+                algorithm,
+                args.backend,
+                args.redis_url,
+                args.max_wait,
+                args.latency,
+            )
+        )
+        for algorithm in args.algorithms
+    ]
+    dump({"results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
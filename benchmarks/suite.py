@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import itertools
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Sequence
+
+from client_throttler import Throttler, ThrottlerConfig, __version__
+from client_throttler.memory import InMemoryRedisClient
+
+BACKEND_MEMORY = "memory"
+BACKEND_REDIS = "redis"
+
+# config overrides of every admission algorithm under benchmark
+ALGORITHMS: Dict[str, dict] = {
+    "sliding_window": {},
+    "coalesced": {"enable_coalescing": True},
+}
+
+# import statements timed in a fresh interpreter
+IMPORTS = [
+    "import client_throttler",
+    "from client_throttler.local import LocalRateLimiter",
+    "from client_throttler import MetricManager",
+    "from client_throttler import Throttler",
+]
+
+
+@dataclass
+class Scenario:
+    """
+    One combination of benchmark dimensions
+    """
+
+    algorithm: str
+    pipeline: bool
+    metrics: bool
+    threads: int
+    processes: int
+
+
+@dataclass
+class ScenarioResult(Scenario):
+    """
+    Measurements of a scenario, latencies are admission latencies in microseconds
+    """
+
+    calls: int
+    duration: float
+    calls_per_sec: float
+    p50_us: float
+    p99_us: float
+    mean_us: float
+    max_us: float
+
+
+def noop() -> None:
+    return
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of sorted values
+    """
+
+    if not sorted_values:
+        return 0.0
+    index = max(
+        0,
+        min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1),
+    )
+    return sorted_values[index]
+
+
+def create_client(backend: str, redis_url: str = None):
+    if backend == BACKEND_MEMORY:
+        return InMemoryRedisClient()
+    if backend == BACKEND_REDIS:
+        from redis import Redis
+
+        return Redis.from_url(redis_url)
+    raise ValueError(f"Invalid backend: {backend}")
+
+
+def build_throttler(scenario: Scenario, redis_client, rate: str, key: str) -> Throttler:
+    return Throttler(
+        ThrottlerConfig(
+            func=noop,
+            rate=rate,
+            key_prefix="benchmark",
+            key=key,
+            redis_client=redis_client,
+            enable_pipeline=scenario.pipeline,
+            enable_metric_record=scenario.metrics,
+            **ALGORITHMS[scenario.algorithm],
+        )
+    )
+
+
+def run_process(
+    scenario: Scenario,
+    backend: str,
+    redis_url: str,
+    rate: str,
+    key: str,
+    calls: int,
+) -> tuple:
+    """
+    Run calls in threads of one process
+    :return: (start timestamp, end timestamp, latencies in seconds)
+    """
+
+    redis_client = create_client(backend, redis_url)
+    throttler = build_throttler(scenario, redis_client, rate, key)
+    latencies: List[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(scenario.threads)
+
+    def worker(worker_calls: int) -> None:
+        local_latencies = []
+        barrier.wait()
+        for _ in range(worker_calls):
+            start = time.perf_counter()
+            throttler()
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+
+    per_thread = [calls // scenario.threads] * scenario.threads
+    per_thread[0] += calls % scenario.threads
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=scenario.threads) as executor:
+        list(executor.map(worker, per_thread))
+    end_time = time.time()
+    if backend == BACKEND_REDIS:
+        throttler.reset()
+        redis_client.delete(throttler.config.metric_key)
+    return start_time, end_time, latencies
+
+
+def run_scenario(
+    scenario: Scenario,
+    backend: str,
+    calls: int,
+    rate: str,
+    redis_url: str = None,
+) -> ScenarioResult:
+    """
+    Run a scenario, calls are split over processes and threads
+    """
+
+    key = uuid.uuid4().hex
+    per_process = [calls // scenario.processes] * scenario.processes
+    per_process[0] += calls % scenario.processes
+    args = (scenario, backend, redis_url, rate, key)
+    if scenario.processes == 1:
+        outputs = [run_process(*args, per_process[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=scenario.processes) as executor:
+            futures = [
+                executor.submit(run_process, *args, count) for count in per_process
+            ]
+            outputs = [future.result() for future in futures]
+
+    start_time = min(output[0] for output in outputs)
+    end_time = max(output[1] for output in outputs)
+    latencies = sorted(itertools.chain.from_iterable(output[2] for output in outputs))
+    duration = end_time - start_time
+    return ScenarioResult(
+        **asdict(scenario),
+        calls=len(latencies),
+        duration=duration,
+        calls_per_sec=len(latencies) / duration if duration else 0.0,
+        p50_us=percentile(latencies, 50) * 1e6,
+        p99_us=percentile(latencies, 99) * 1e6,
+        mean_us=sum(latencies) / len(latencies) * 1e6 if latencies else 0.0,
+        max_us=latencies[-1] * 1e6 if latencies else 0.0,
+    )
+
+
+@dataclass
+class ImportResult:
+    """
+    Import time of a statement in a fresh interpreter, in milliseconds
+    """
+
+    statement: str
+    runs: int
+    median_ms: float
+    min_ms: float
+
+
+def measure_import(statement: str, runs: int) -> ImportResult:
+    """
+    Time an import statement in fresh interpreters, so that cached modules do not hide its cost
+    """
+
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - start)"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])),
+    )
+    durations = sorted(
+        float(subprocess.check_output([sys.executable, "-c", code], env=env)) * 1e3
+        for _ in range(runs)
+    )
+    return ImportResult(
+        statement=statement,
+        runs=runs,
+        median_ms=durations[len(durations) // 2],
+        min_ms=durations[0],
+    )
+
+
+def build_scenarios(
+    algorithms: Sequence[str],
+    pipelines: Sequence[bool],
+    metrics: Sequence[bool],
+    threads: Sequence[int],
+    processes: Sequence[int],
+) -> List[Scenario]:
+    return [
+        Scenario(*values)
+        for values in itertools.product(
+            algorithms, pipelines, metrics, threads, processes
+        )
+    ]
+
+
+def run_suite(
+    scenarios: Sequence[Scenario],
+    backend: str = BACKEND_MEMORY,
+    calls: int = 10000,
+    rate: str = "1000000/s",
+    redis_url: str = None,
+    import_runs: int = 0,
+) -> dict:
+    """
+    Run scenarios and return a JSON serializable report
+    :param import_runs: Fresh interpreters timing each of IMPORTS, 0 to skip
+    """
+
+    results = [
+        asdict(run_scenario(scenario, backend, calls, rate, redis_url))
+        for scenario in scenarios
+    ]
+    imports = [
+        asdict(measure_import(statement, import_runs))
+        for statement in (IMPORTS if import_runs else [])
+    ]
+    return {
+        "meta": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": backend,
+            # the memory backend lives in each process, so processes do not share limits
+            "shared_backend": backend == BACKEND_REDIS,
+            "rate": rate,
+            "calls": calls,
+            "timestamp": time.time(),
+        },
+        "results": results,
+        "imports": imports,
+    }
+
+
+class LocalRedisServer:
+    """
+    Throwaway redis-server on a free local port
+    """
+
+    def __init__(self, executable: str = "redis-server"):
+        self.executable = shutil.which(executable)
+        if not self.executable:
+            raise RuntimeError(f"{executable} not found")
+        self.port = self._free_port()
+        self.process = None
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.port}/0"
+
+    def __enter__(self) -> "LocalRedisServer":
+        self.process = subprocess.Popen(
+            [
+                self.executable,
+                "--port",
+                str(self.port),
+                "--save",
+                "",
+                "--appendonly",
+                "no",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.1):
+                    return self
+            except OSError:
+                time.sleep(0.05)
+        self.process.kill()
+        raise RuntimeError("redis-server did not start")
+
+    def __exit__(self, *args, **kwargs):
+        self.process.terminate()
+        self.process.wait()
+
+
+def dump(report: dict, output: str = None) -> None:
+    content = json.dumps(report, indent=2)
+    if not output:
+        sys.stdout.write(content + "\n")
+        return
+    with open(output, "w") as f:
+        f.write(content)
@@ -23,10 +23,19 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from client_throttler.configs import ThrottlerConfig, setup
-from client_throttler.decorators import throttler
-from client_throttler.metrics import MetricManager
-from client_throttler.throttler import Throttler
+import importlib
+import sys
+from types import ModuleType
+
+# public names are imported on first access, so that importing the package does not load redis
+_EXPORTS = {
+    "setup": "client_throttler.configs",
+    "throttler": "client_throttler.decorators",
+    "Throttler": "client_throttler.throttler",
+    "ThrottlerConfig": "client_throttler.configs",
+    "MetricManager": "client_throttler.metrics",
+    "InMemoryRedisClient": "client_throttler.memory",
+}
 
 __all__ = [
     "setup",
@@ -34,6 +43,30 @@ __all__ = [
     "Throttler",
     "ThrottlerConfig",
     "MetricManager",
+    "InMemoryRedisClient",
 ]
 
 __version__ = "2.1.0"
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Package(ModuleType):
+    def __setattr__(self, name, value):
+        # loading the client_throttler.throttler submodule must not shadow the throttler decorator
+        if name == "throttler" and isinstance(value, ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
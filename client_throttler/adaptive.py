@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+from typing import Optional
+
+from client_throttler.clock import LocalClock
+from client_throttler.configs import ThrottlerConfig
+from client_throttler.constants import CACHE_KEY_TIMEOUT
+
+RATE_FIELD = "rate"
+PAUSED_UNTIL_FIELD = "paused_until"
+
+
+class AdaptiveRate:
+    """
+    AIMD rate shared by every node in a redis hash
+
+    Each success adds adaptive_increase / rate, so the rate grows by adaptive_increase per window of successes,
+    up to the configured max_requests. A throttle signal multiplies the rate by adaptive_decrease_factor,
+    down to adaptive_min_requests, at most once per interval: requests in flight are throttled together
+    and report a single decrease. A retry-after pauses admission on every node.
+
+    The hash is read at most once per adaptive_sync_interval, increases are sent with the next read
+    and decreases are written at once.
+
+    :param config: Frozen ThrottlerConfig
+    :param clock: Clock of the throttler
+    :param get_pipeline: Pipeline factory of the throttler
+    """
+
+    def __init__(
+        self, config: ThrottlerConfig, clock: LocalClock, get_pipeline: callable
+    ):
+        self.config = config
+        self.clock = clock
+        self.get_pipeline = get_pipeline
+        self._lock = threading.Lock()
+        self._rate = float(config.max_requests)
+        self._paused_until = 0.0
+        self._pending_increase = 0.0
+        self._synced_at = None
+        self._decreased_at = None
+
+    @property
+    def max_requests(self) -> int:
+        self.refresh()
+        return max(int(self._rate), self.config.adaptive_min_requests)
+
+    @property
+    def paused_until(self) -> float:
+        self.refresh()
+        return self._paused_until
+
+    def refresh(self) -> None:
+        now = self.clock.monotonic()
+        if (
+            self._synced_at is not None
+            and now - self._synced_at < self.config.adaptive_sync_interval
+        ):
+            return
+        with self._lock:
+            if (
+                self._synced_at is not None
+                and now - self._synced_at < self.config.adaptive_sync_interval
+            ):
+                return
+            self.sync()
+            self._synced_at = now
+
+    def sync(self) -> None:
+        """
+        Send pending increases and load the shared state
+        """
+
+        key = self.config.adaptive_key
+        increase, self._pending_increase = self._pending_increase, 0.0
+        with self.get_pipeline() as pipe:
+            if increase:
+                pipe.hincrbyfloat(key, RATE_FIELD, increase)
+                pipe.expire(key, CACHE_KEY_TIMEOUT)
+            pipe.hmget(key, RATE_FIELD, PAUSED_UNTIL_FIELD)
+            rate, paused_until = pipe.execute()[-1]
+        rate = float(rate) if rate is not None else float(self.config.max_requests)
+        if rate > self.config.max_requests:
+            rate = float(self.config.max_requests)
+            self.config.redis_client.hset(key, RATE_FIELD, rate)
+        self._rate = rate
+        self._paused_until = float(paused_until or 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rate = float(self.config.max_requests)
+            self._paused_until = 0.0
+            self._pending_increase = 0.0
+            self._synced_at = None
+            self._decreased_at = None
+
+    def on_success(self) -> None:
+        if self._rate >= self.config.max_requests:
+            return
+        with self._lock:
+            self._pending_increase += self.config.adaptive_increase / max(self._rate, 1)
+
+    def on_throttled(
+        self, retry_after: Optional[float] = None, share: bool = True
+    ) -> None:
+        """
+        Lower the rate and pause when upstream asked to
+        :param retry_after: Seconds every node should wait before the next request
+        :param share: Whether to write the lowered rate to redis for the other nodes
+        """
+
+        mapping = {}
+        if retry_after:
+            mapping[PAUSED_UNTIL_FIELD] = self.clock.time() + retry_after
+        now = self.clock.monotonic()
+        with self._lock:
+            # signals within an interval of the last decrease answer requests sent before it
+            if (
+                self._decreased_at is None
+                or now - self._decreased_at >= self.config.interval
+            ):
+                self._decreased_at = now
+                self._rate = max(
+                    self._rate * self.config.adaptive_decrease_factor,
+                    float(self.config.adaptive_min_requests),
+                )
+                self._pending_increase = 0.0
+                mapping[RATE_FIELD] = self._rate
+            self._paused_until = mapping.get(PAUSED_UNTIL_FIELD, self._paused_until)
+        if not share or not mapping:
+            return
+        with self.get_pipeline() as pipe:
+            for field, value in mapping.items():
+                pipe.hset(self.config.adaptive_key, field, value)
+            pipe.expire(self.config.adaptive_key, CACHE_KEY_TIMEOUT)
+            pipe.execute()
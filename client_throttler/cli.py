@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, fields
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, List, TextIO
+
+from client_throttler.configs import ThrottlerConfig
+from client_throttler.constants import (
+    ADAPTIVE_KEY_FORMAT,
+    CACHE_KEY_FORMAT,
+    IN_FLIGHT_KEY_FORMAT,
+    METRIC_KEY_FORMAT,
+    QUOTA_KEY_FORMAT,
+    SHARD_KEY_FORMAT,
+    TimeDurationUnit,
+)
+from client_throttler.metrics import MetricData, MetricManager
+from client_throttler.redis import create_redis_client
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+DEFAULT_REDIS_URL = "redis://127.0.0.1:6379/0"
+# keys written for a limiter, besides the quota counters
+KEY_FORMATS = (
+    CACHE_KEY_FORMAT,
+    METRIC_KEY_FORMAT,
+    ADAPTIVE_KEY_FORMAT,
+    IN_FLIGHT_KEY_FORMAT,
+    SHARD_KEY_FORMAT,
+)
+# shortest window a rate is measured over, so that a single recent request does not read as a burst
+MIN_SPAN = 100 * TimeDurationUnit.MILLISECOND.value
+CLEAR_SCREEN = "\033[H\033[J"
+EXPORT_JSON = "json"
+EXPORT_CSV = "csv"
+
+
+@dataclass
+class KeyRate:
+    """
+    Admissions of a limiter key over the last window
+
+    :param key: Key of the rate-limited method, with its prefix
+    :param count: Requests admitted within the window
+    :param rate: Requests per second within the window
+    :param window: Seconds counted, shorter than asked when the request log holds less history
+    """
+
+    key: str
+    count: int
+    rate: float
+    window: float
+
+
+def decode(key) -> str:
+    return key.decode() if isinstance(key, bytes) else key
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def scan_keys(redis_client: "Redis", match: str, batch_size: int) -> Iterator[str]:
+    """
+    Iterate the keys matching a pattern with SCAN, which does not block redis like KEYS
+    """
+
+    for key in redis_client.scan_iter(match=match, count=batch_size):
+        yield decode(key)
+
+
+def read_rates(
+    redis_client: "Redis",
+    pattern: str,
+    window: float,
+    batch_size: int,
+    now: float = None,
+) -> List[KeyRate]:
+    """
+    Count the admissions of every limiter key matching pattern over the last window seconds,
+    one pipeline per batch of scanned keys.
+    Admissions are counted in the metrics of the key when recorded, which keep an hour of history.
+    Otherwise they are counted in the request log, which only keeps the last interval of the limiter,
+    so the window is shortened to the age of its oldest request.
+    :param pattern: Glob of the limiter keys, as <prefix>:<key>
+    :return: Rates, busiest key first
+    """
+
+    now = time.time() if now is None else now
+    offset = len(CACHE_KEY_FORMAT.format(""))
+    rates = []
+    keys = scan_keys(redis_client, CACHE_KEY_FORMAT.format(pattern), batch_size)
+    for batch in batched(keys, batch_size):
+        with redis_client.pipeline(transaction=False) as pipe:
+            for key in batch:
+                metric_key = METRIC_KEY_FORMAT.format(key[offset:])
+                pipe.exists(metric_key)
+                pipe.zcount(metric_key, now - window, now)
+                pipe.zcount(key, now - window, now)
+                pipe.zrangebyscore(key, "-inf", now, start=0, num=1, withscores=True)
+            results = pipe.execute()
+        for index, key in enumerate(batch):
+            recorded, metric_count, count, oldest = results[index * 4 : index * 4 + 4]
+            span = window
+            if recorded:
+                count = metric_count
+            elif oldest and now - oldest[0][1] < window:
+                # n requests leave n - 1 gaps after the oldest one, add the missing gap
+                age = now - oldest[0][1]
+                span = max(age * count / (count - 1) if count > 1 else age, MIN_SPAN)
+            rates.append(
+                KeyRate(key=key[offset:], count=count, rate=count / span, window=span)
+            )
+    rates.sort(key=lambda item: (-item.rate, item.key))
+    return rates
+
+
+def format_rates(rates: List[KeyRate], window: float, limit: int = None) -> str:
+    shown = rates[:limit]
+    width = max([len(item.key) for item in shown] + [3])
+    lines = [
+        f"{time.strftime('%Y-%m-%d %H:%M:%S')}  keys: {len(rates)}  window: {window}s",
+        f"{'KEY':<{width}}  {'REQUESTS':>10}  {'RATE/S':>10}  {'WINDOW/S':>10}",
+    ]
+    lines.extend(
+        f"{item.key:<{width}}  {item.count:>10}  {item.rate:>10.2f}  {item.window:>10.2f}"
+        for item in shown
+    )
+    return "\n".join(lines) + "\n"
+
+
+def top(redis_client: "Redis", args: argparse.Namespace, output: TextIO = None) -> None:
+    """
+    Print the busiest limiter keys every refresh seconds, like top
+    """
+
+    output = output or sys.stdout
+    iteration = 0
+    while True:
+        rates = read_rates(redis_client, args.pattern, args.window, args.batch_size)
+        if output.isatty():
+            output.write(CLEAR_SCREEN)
+        output.write(format_rates(rates, args.window, args.limit))
+        output.flush()
+        iteration += 1
+        if args.iterations and iteration >= args.iterations:
+            return
+        time.sleep(args.refresh)
+
+
+def reset_keys(
+    redis_client: "Redis", pattern: str, batch_size: int, dry_run: bool = False
+) -> List[str]:
+    """
+    Delete every key of the limiters matching pattern, batch_size keys per DEL
+    :param pattern: Glob of the limiter keys, as <prefix>:<key>
+    :param dry_run: Only list the keys
+    :return: Matched keys
+    """
+
+    matches = [key_format.format(pattern) for key_format in KEY_FORMATS]
+    # quota counters carry the start of their window after the key
+    matches.append(QUOTA_KEY_FORMAT.format(f"{pattern}:*"))
+    matched = []
+    for match in matches:
+        for batch in batched(scan_keys(redis_client, match, batch_size), batch_size):
+            matched.extend(batch)
+            if not dry_run:
+                redis_client.delete(*batch)
+    return matched
+
+
+def load_metrics(
+    redis_client: "Redis",
+    pattern: str,
+    batch_size: int,
+    start_time: float = None,
+    end_time: float = None,
+) -> List[MetricData]:
+    """
+    Load the metrics of the limiters matching pattern, one pipeline per batch of scanned keys
+    :param pattern: Glob of the limiter keys, as <prefix>:<key>
+    :param start_time: Timestamp of the first metric, an hour before end_time by default
+    :param end_time: Timestamp of the last metric, now by default
+    """
+
+    manager = MetricManager(
+        ThrottlerConfig(redis_client=redis_client), start_time, end_time
+    )
+    metrics = []
+    keys = scan_keys(redis_client, METRIC_KEY_FORMAT.format(pattern), batch_size)
+    for batch in batched(keys, batch_size):
+        with redis_client.pipeline(transaction=False) as pipe:
+            for key in batch:
+                pipe.zrangebyscore(
+                    key, manager.start_time, manager.end_time, withscores=True
+                )
+            results = pipe.execute()
+        for key, data in zip(batch, results):
+            metrics.extend(manager.format_metric(key, data))
+    metrics.sort(key=lambda item: item.timestamp)
+    return metrics
+
+
+def write_metrics(metrics: List[MetricData], export_format: str, output: TextIO):
+    if export_format == EXPORT_JSON:
+        json.dump([asdict(item) for item in metrics], output, indent=2)
+        output.write("\n")
+        return
+    writer = csv.DictWriter(output, [field.name for field in fields(MetricData)])
+    writer.writeheader()
+    writer.writerows(asdict(item) for item in metrics)
+
+
+def parse_args(args=None) -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--redis-url", default=DEFAULT_REDIS_URL)
+    common.add_argument(
+        "--batch-size", type=int, default=500, help="keys per SCAN, pipeline and DEL"
+    )
+    parser = argparse.ArgumentParser(
+        prog="client-throttler",
+        description="Watch, reset and export the limiters stored in redis",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    top_parser = commands.add_parser(
+        "top", parents=[common], help="live view of per-key admission rates"
+    )
+    top_parser.add_argument("--pattern", default="*", help="glob of <prefix>:<key>")
+    top_parser.add_argument(
+        "--window", type=float, default=10, help="seconds of admissions counted"
+    )
+    top_parser.add_argument(
+        "--refresh", type=float, default=2, help="seconds between two refreshes"
+    )
+    top_parser.add_argument("--limit", type=int, default=20, help="keys shown")
+    top_parser.add_argument(
+        "--iterations",
+        type=int,
+        default=0,
+        help="refreshes before exiting, 0 to run forever",
+    )
+
+    reset_parser = commands.add_parser(
+        "reset", parents=[common], help="delete the keys of limiters"
+    )
+    reset_parser.add_argument("--pattern", required=True, help="glob of <prefix>:<key>")
+    reset_parser.add_argument(
+        "--dry-run", action="store_true", help="list the keys without deleting them"
+    )
+
+    export_parser = commands.add_parser(
+        "export", parents=[common], help="export recorded metrics"
+    )
+    export_parser.add_argument("--pattern", default="*", help="glob of <prefix>:<key>")
+    export_parser.add_argument(
+        "--format", choices=[EXPORT_JSON, EXPORT_CSV], default=EXPORT_JSON
+    )
+    export_parser.add_argument(
+        "--start",
+        type=float,
+        help="timestamp of the first metric, an hour ago by default",
+    )
+    export_parser.add_argument(
+        "--end", type=float, help="timestamp of the last metric, now by default"
+    )
+    export_parser.add_argument("--output", help="write to this file instead of stdout")
+    return parser.parse_args(args)
+
+
+def main(args=None) -> None:
+    args = parse_args(args)
+    redis_client = create_redis_client(args.redis_url, max_connections=1)
+    if args.command == "top":
+        try:
+            top(redis_client, args)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "reset":
+        keys = reset_keys(redis_client, args.pattern, args.batch_size, args.dry_run)
+        if args.dry_run:
+            sys.stdout.writelines(f"{key}\n" for key in keys)
+            sys.stdout.write(f"{len(keys)} keys matched\n")
+        else:
+            sys.stdout.write(f"{len(keys)} keys deleted\n")
+    else:
+        metrics = load_metrics(
+            redis_client, args.pattern, args.batch_size, args.start, args.end
+        )
+        if not args.output:
+            write_metrics(metrics, args.format, sys.stdout)
+            return
+        with open(args.output, "w", newline="") as f:
+            write_metrics(metrics, args.format, f)
+
+
+if __name__ == "__main__":
+    main()
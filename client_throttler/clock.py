@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+
+class LocalClock:
+    """
+    Local clock, time() gives scores stored in redis, monotonic() measures local waiting and sleep() waits
+    """
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def to_epoch(self, monotonic: float) -> float:
+        """
+        Local wall time (seconds since epoch) of a monotonic time, to report it
+        """
+
+        return time.time() - time.monotonic() + monotonic
+
+
+class SimulatedClock(LocalClock):
+    """
+    Virtual clock for tests and simulations, time only moves on sleep() and advance()
+
+    :param start: Wall time (seconds) of virtual time zero
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.start = start
+        self._lock = threading.Lock()
+        self._now = 0.0
+
+    def time(self) -> float:
+        return self.start + self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def to_epoch(self, monotonic: float) -> float:
+        return self.start + monotonic
+
+    def advance(self, seconds: float) -> None:
+        with self._lock:
+            self._now += max(0.0, seconds)
+
+    def move_to(self, monotonic: float) -> None:
+        """
+        Move to a virtual monotonic time, the clock never goes back
+        """
+
+        with self._lock:
+            self._now = max(self._now, monotonic)
+
+
+class RedisClock(LocalClock):
+    """
+    Redis server clock, so that every node scores requests on the same timeline.
+
+    The offset between the server clock and the local monotonic clock is measured with TIME
+    and refreshed every sync_interval seconds, local clock drift and NTP steps are ignored in between.
+
+    :param redis_client: Redis Client
+    :param sync_interval: Seconds between two TIME calls
+    """
+
+    def __init__(self, redis_client: "Redis", sync_interval: float):
+        self.redis_client = redis_client
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._offset = None
+        self._synced_at = None
+
+    def sync(self) -> None:
+        """
+        Measure the offset between server time and local monotonic time,
+        assuming TIME is served halfway through the round trip
+        """
+
+        sent = time.monotonic()
+        seconds, microseconds = self.redis_client.time()
+        received = time.monotonic()
+        self._offset = int(seconds) + int(microseconds) / 1e6 - (sent + received) / 2
+        self._synced_at = received
+
+    def time(self) -> float:
+        now = time.monotonic()
+        if self._synced_at is None or now - self._synced_at >= self.sync_interval:
+            with self._lock:
+                if (
+                    self._synced_at is None
+                    or now - self._synced_at >= self.sync_interval
+                ):
+                    self.sync()
+            now = time.monotonic()
+        return now + self._offset
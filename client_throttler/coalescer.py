@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+from typing import TYPE_CHECKING, List, Optional
+
+from client_throttler.constants import Defaults
+
+if TYPE_CHECKING:
+    from client_throttler.throttler import Admission, Throttler
+
+
+class Batch:
+    """
+    Admission requests sharing one round trip
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.admissions: Optional[List["Admission"]] = None
+        self.error: Optional[BaseException] = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class Coalescer:
+    """
+    Batch the admission checks of concurrent callers into one pipeline.
+
+    The first caller of a batch leads it: it waits up to max_delay seconds, or until max_batch callers joined,
+    then sends every admission in one round trip and fans the results out to the other callers.
+
+    :param throttler: Throttler whose admissions are batched
+    :param max_batch: Max admission checks in one round trip
+    :param max_delay: Max seconds the leader waits for other callers
+    """
+
+    def __init__(
+        self,
+        throttler: "Throttler",
+        max_batch: int = Defaults.coalesce_max_batch,
+        max_delay: float = Defaults.coalesce_max_delay,
+    ):
+        self.throttler = throttler
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._batch: Optional[Batch] = None
+
+    def get_admission(self, start_time: float, tag: str, now: float) -> "Admission":
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = Batch()
+            index = len(batch.requests)
+            batch.requests.append((start_time, tag, now))
+            if len(batch.requests) >= self.max_batch:
+                self._batch = None
+                batch.full.set()
+        if leader:
+            batch.full.wait(self.max_delay)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self.execute(batch)
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        return batch.admissions[index]
+
+    def execute(self, batch: Batch) -> None:
+        try:
+            with self.throttler._get_pipline() as pipe:
+                sizes: List[int] = [
+                    self.throttler.queue_admission(pipe, *request)
+                    for request in batch.requests
+                ]
+                results = pipe.execute()
+            batch.admissions = []
+            offset = 0
+            for size in sizes:
+                batch.admissions.append(
+                    self.throttler.parse_admission(results[offset : offset + size])
+                )
+                offset += size
+        except BaseException as err:
+            batch.error = err
+        finally:
+            batch.done.set()
@@ -23,21 +23,30 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, replace
+from datetime import tzinfo
 from functools import cached_property
-from typing import Tuple, Union
-
-from redis import Redis
+from typing import TYPE_CHECKING, Dict, Sequence, Tuple, Union
 
 from client_throttler.constants import (
+    ADAPTIVE_KEY_FORMAT,
     CACHE_KEY_FORMAT,
+    IN_FLIGHT_KEY_FORMAT,
     METRIC_KEY_FORMAT,
-    RATE_PATTERN,
+    QUOTA_KEY_FORMAT,
+    SHARD_KEY_FORMAT,
     Defaults,
-    TimeDurationUnit,
     Unset,
 )
-from client_throttler.exceptions import RateParseError
+from client_throttler.exceptions import ConfigError, ConfigFrozenError
+from client_throttler.quota import Quota, parse_quota
+from client_throttler.rate import Rate, parse_rate
+from client_throttler.redis import warmup_connections
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+    from client_throttler.clock import LocalClock
 
 
 @dataclass(kw_only=True)
@@ -46,7 +55,8 @@ class ThrottlerConfig:
     Configuration for throttler.
 
     :param rate: The rate limit string
-        eg: 1/s, 100/min, 20/5s, period should be one of: ('ms', 'msec', 's', 'sec', 'm', 'min')
+        eg: 1/s, 100/min, 20/5sec, period should be one of TIME_UNIT_ALIASES,
+        such as ('ms', 'msec', 's', 'sec', 'm', 'min', 'h', 'hour', 'd', 'day')
     :param prefix: Prefix for the key
     :param key: A str or function that returns the key for the rate-limited method
     :param enable_sleep_wait: Whether to sleep and wait for retry after being rate-limited
@@ -57,6 +67,49 @@ class ThrottlerConfig:
     :param enable_metric_record: Whether to record request count in time series
     :param enable_pipeline: Whether to enable pipeline
     :param placeholder_offset: Buffer seconds keeping request placeholder before auto cleanup
+    :param hooks: Callables receiving a HookEvent with the timing and outcome of each redis operation and sleep
+    :param expected_concurrency: Number of threads expected to share the throttler,
+        the redis connection pool must be able to serve them
+    :param enable_server_time: Whether to score requests with the redis server clock instead of the local clock
+    :param clock_sync_interval: Seconds between two syncs with the redis server clock
+    :param failure_policy: How to admit requests when redis fails, one of FailurePolicy
+    :param circuit_breaker_threshold: Consecutive redis failures before redis is skipped for a cooldown, 0 to disable
+    :param circuit_breaker_cooldown: Seconds to skip redis once the circuit breaker opens
+    :param fallback_nodes: Number of nodes sharing the rate, each node admits 1/fallback_nodes of it locally
+        under the local failure policy
+    :param enable_adaptive_rate: Whether to adapt the rate (AIMD) to throttle signals from upstream,
+        the configured rate is the ceiling
+    :param adaptive_feedback: Callable receiving the result of func, returns True or a retry-after (seconds)
+        when upstream throttled the request, None or False otherwise
+    :param adaptive_min_requests: Floor of the adaptive rate
+    :param adaptive_increase: Requests added to the adaptive rate per window of successful requests
+    :param adaptive_decrease_factor: Factor applied to the adaptive rate on a throttle signal, at most once per interval
+    :param adaptive_sync_interval: Seconds between two reads of the adaptive rate shared in redis
+    :param max_in_flight: Max concurrent executions of func across all nodes, 0 to disable
+    :param lease_timeout: Seconds after which the in-flight lease of a crashed caller is reclaimed,
+        should be longer than the slowest call of func
+    :param in_flight_poll_interval: Max seconds to wait before retrying when max_in_flight is reached
+    :param priority: Priority class of the requests, classes sharing a key should share priority_shares
+    :param priority_shares: Share of the rate (0-1) reserved for each priority class,
+        a class is admitted only while the shares of higher classes are left
+    :param enable_pacing: Whether to spread requests evenly over the interval, interval / max_requests apart
+    :param burst: Requests admitted back to back when pacing, at most burst requests in any burst pacing slots
+    :param placeholder_timeout: Seconds after which the placeholder of a caller that crashed while being admitted
+        is reclaimed, 0 to disable, should be under half of placeholder_offset
+    :param compaction_margin: Requests kept beyond max_requests in the request log, older ones are removed,
+        0 to disable. Placeholders and permits booked by reserve are not counted
+    :param enable_coalescing: Whether to batch the admission checks of concurrent callers into one round trip
+    :param coalesce_max_batch: Max admission checks in one round trip
+    :param coalesce_max_delay: Max seconds the first caller of a batch waits for other callers
+    :param enable_sharding: Whether each node enforces max_requests / live nodes locally, without redis per call,
+        the global rate is approximate, not combined with max_in_flight, priority_shares, adaptive rate or pacing
+    :param shard_sync_interval: Seconds between two heartbeats of a node, which also count the live nodes
+    :param node_timeout: Seconds without heartbeat after which a node is no longer live
+    :param clock: LocalClock giving time, monotonic time and sleep, eg: a SimulatedClock in tests,
+        enable_server_time is ignored when set
+    :param quota: Requests allowed in each calendar window, eg: 10000/day, 1000/month,
+        counted on top of rate, set rate to "" to throttle on the quota only
+    :param quota_timezone: Timezone whose calendar aligns the quota windows, UTC by default
     """
 
     rate: str = Unset()
@@ -65,11 +118,48 @@ class ThrottlerConfig:
     enable_sleep_wait: bool = Unset()
     max_retry_times: int = Unset()
     max_retry_duration: float = Unset()
-    redis_client: Redis = Unset()
+    redis_client: "Redis" = Unset()
     func: callable = Unset()
     enable_metric_record: bool = Unset()
     enable_pipeline: bool = Unset()
     placeholder_offset: float = Unset()
+    hooks: Sequence[callable] = Unset()
+    expected_concurrency: int = Unset()
+    enable_server_time: bool = Unset()
+    clock_sync_interval: float = Unset()
+    failure_policy: str = Unset()
+    circuit_breaker_threshold: int = Unset()
+    circuit_breaker_cooldown: float = Unset()
+    fallback_nodes: int = Unset()
+    enable_adaptive_rate: bool = Unset()
+    adaptive_feedback: callable = Unset()
+    adaptive_min_requests: int = Unset()
+    adaptive_increase: float = Unset()
+    adaptive_decrease_factor: float = Unset()
+    adaptive_sync_interval: float = Unset()
+    max_in_flight: int = Unset()
+    lease_timeout: float = Unset()
+    in_flight_poll_interval: float = Unset()
+    priority: int = Unset()
+    priority_shares: Dict[int, float] = Unset()
+    enable_pacing: bool = Unset()
+    burst: int = Unset()
+    placeholder_timeout: float = Unset()
+    compaction_margin: int = Unset()
+    enable_coalescing: bool = Unset()
+    coalesce_max_batch: int = Unset()
+    coalesce_max_delay: float = Unset()
+    enable_sharding: bool = Unset()
+    shard_sync_interval: float = Unset()
+    node_timeout: float = Unset()
+    clock: "LocalClock" = Unset()
+    quota: str = Unset()
+    quota_timezone: tzinfo = Unset()
+
+    def __setattr__(self, key, value):
+        if self.__dict__.get("_frozen"):
+            raise ConfigFrozenError(key)
+        super().__setattr__(key, value)
 
     @cached_property
     def cache_key(self) -> str:
@@ -79,6 +169,22 @@ class ThrottlerConfig:
     def metric_key(self) -> str:
         return METRIC_KEY_FORMAT.format(f"{self.key_prefix}:{self.redis_key}")
 
+    @cached_property
+    def adaptive_key(self) -> str:
+        return ADAPTIVE_KEY_FORMAT.format(f"{self.key_prefix}:{self.redis_key}")
+
+    @cached_property
+    def in_flight_key(self) -> str:
+        return IN_FLIGHT_KEY_FORMAT.format(f"{self.key_prefix}:{self.redis_key}")
+
+    @cached_property
+    def shard_key(self) -> str:
+        return SHARD_KEY_FORMAT.format(f"{self.key_prefix}:{self.redis_key}")
+
+    @cached_property
+    def quota_key(self) -> str:
+        return QUOTA_KEY_FORMAT.format(f"{self.key_prefix}:{self.redis_key}")
+
     @cached_property
     def redis_key(self) -> str:
         if callable(self.key):
@@ -89,30 +195,54 @@ class ThrottlerConfig:
 
     @cached_property
     def max_requests(self) -> int:
-        return self.parse_rate(self.rate)[0]
+        return self.parse_rate(self.rate).max_requests
 
     @cached_property
     def interval(self) -> float:
-        return self.parse_rate(self.rate)[1]
+        return self.parse_rate(self.rate).interval
 
-    def parse_rate(self, rate: str) -> Tuple[int, float]:
+    def parse_rate(self, rate: str) -> Rate:
         """
-        Given the request rate string, return a two tuple of:
+        Given the request rate string, return a Rate of:
         <max_requests>, <period in seconds>
         """
 
-        match = RATE_PATTERN.match(str(rate))
+        return parse_rate(rate)
+
+    @cached_property
+    def pacing_burst(self) -> int:
+        return self.parse_pacing(self.rate, self.burst)[0]
+
+    @cached_property
+    def pacing_interval(self) -> float:
+        return self.parse_pacing(self.rate, self.burst)[1]
+
+    @cached_property
+    def quota_max_requests(self) -> int:
+        return self.parse_quota(self.quota).max_requests
 
-        if not match:
-            raise RateParseError(rate)
+    @cached_property
+    def quota_unit(self) -> str:
+        return self.parse_quota(self.quota).unit
 
-        max_requests = int(match.group(1))
-        value = float(match.group(2) or Defaults.unit_value)
-        try:
-            unit = TimeDurationUnit.get_unit_value(match.group(3))
-        except ValueError:
-            raise RateParseError(rate)
-        return max_requests, value * unit
+    def parse_quota(self, quota: str) -> Quota:
+        """
+        Given the quota string, return a Quota of:
+        <max_requests>, <calendar unit>
+        """
+
+        return parse_quota(quota)
+
+    def parse_pacing(self, rate: str, burst: int) -> Tuple[int, float]:
+        """
+        Given the request rate string and the burst size, return a two tuple of:
+        <max requests in a pacing window>, <pacing window in seconds>
+        """
+
+        max_requests, interval = self.parse_rate(rate)
+        if not 1 <= burst <= max_requests:
+            raise ConfigError("burst", burst)
+        return burst, interval * burst / max_requests
 
     def mix_config(
         self, config: "ThrottlerConfig" = None, replace: bool = False
@@ -128,7 +258,8 @@ class ThrottlerConfig:
         config = config or default_config
 
         # replace None with default value
-        for key, val in self.__dict__.items():
+        for key in CONFIG_FIELDS:
+            val = getattr(self, key)
             # skip already configured and not force replace
             if not isinstance(val, Unset) and not replace:
                 continue
@@ -138,14 +269,63 @@ class ThrottlerConfig:
                 continue
             setattr(self, key, default_val)
 
+    def copy(self, **changes) -> "ThrottlerConfig":
+        """
+        Return an unfrozen copy of the config with changes applied
+        """
+
+        return replace(self, **changes)
+
+    def resolve(self) -> "ThrottlerConfig":
+        """
+        Return an unfrozen copy of the config with unset fields taken from the default config,
+        equal to copy() then mix_config() in a single construction
+        """
+
+        values = {}
+        for key in CONFIG_FIELDS:
+            val = self.__dict__[key]
+            if isinstance(val, Unset):
+                val = default_config.__dict__[key]
+            values[key] = val
+        return ThrottlerConfig(**values)
+
+    def freeze(self) -> None:
+        """
+        Resolve keys and rate, then reject further changes,
+        so that the config can be read by many threads without locking
+        """
+
+        _ = self.cache_key, self.metric_key, self.adaptive_key, self.in_flight_key
+        _ = self.shard_key, self.quota_key
+        if self.rate:
+            _ = self.max_requests, self.interval
+        if self.rate and self.enable_pacing:
+            _ = self.pacing_burst, self.pacing_interval
+        if self.quota:
+            _ = self.quota_max_requests, self.quota_unit
+        object.__setattr__(self, "_frozen", True)
+
+    @property
+    def frozen(self) -> bool:
+        return self.__dict__.get("_frozen", False)
+
+
+CONFIG_FIELDS = tuple(field.name for field in fields(ThrottlerConfig))
+
 
-def setup(config: ThrottlerConfig):
+def setup(config: ThrottlerConfig, warm: bool = False):
     """
     Configure the default params
+    :param warm: Whether to open expected_concurrency connections of the default redis client now
     """
 
     global default_config
     default_config.mix_config(config=config, replace=True)
+    if warm and default_config.redis_client:
+        warmup_connections(
+            default_config.redis_client, default_config.expected_concurrency or 1
+        )
 
 
 default_config = ThrottlerConfig(
@@ -153,4 +333,33 @@ default_config = ThrottlerConfig(
     enable_metric_record=Defaults.enable_metric_record,
     enable_pipeline=True,
     placeholder_offset=Defaults.placeholder_offset,
+    hooks=Defaults.hooks,
+    enable_server_time=Defaults.enable_server_time,
+    clock_sync_interval=Defaults.clock_sync_interval,
+    failure_policy=Defaults.failure_policy,
+    circuit_breaker_threshold=Defaults.circuit_breaker_threshold,
+    circuit_breaker_cooldown=Defaults.circuit_breaker_cooldown,
+    fallback_nodes=Defaults.fallback_nodes,
+    enable_adaptive_rate=Defaults.enable_adaptive_rate,
+    adaptive_min_requests=Defaults.adaptive_min_requests,
+    adaptive_increase=Defaults.adaptive_increase,
+    adaptive_decrease_factor=Defaults.adaptive_decrease_factor,
+    adaptive_sync_interval=Defaults.adaptive_sync_interval,
+    max_in_flight=Defaults.max_in_flight,
+    lease_timeout=Defaults.lease_timeout,
+    in_flight_poll_interval=Defaults.in_flight_poll_interval,
+    priority=Defaults.priority,
+    priority_shares=Defaults.priority_shares,
+    enable_pacing=Defaults.enable_pacing,
+    burst=Defaults.burst,
+    placeholder_timeout=Defaults.placeholder_timeout,
+    compaction_margin=Defaults.compaction_margin,
+    enable_coalescing=Defaults.enable_coalescing,
+    coalesce_max_batch=Defaults.coalesce_max_batch,
+    coalesce_max_delay=Defaults.coalesce_max_delay,
+    enable_sharding=Defaults.enable_sharding,
+    shard_sync_interval=Defaults.shard_sync_interval,
+    node_timeout=Defaults.node_timeout,
+    quota=Defaults.quota,
+    quota_timezone=Defaults.quota_timezone,
 )
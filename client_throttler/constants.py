@@ -24,14 +24,19 @@ SOFTWARE.
 """
 
 import re
-from datetime import timedelta
+from datetime import timedelta, timezone
 from enum import Enum
 from types import DynamicClassAttribute
 
 RATE_PATTERN = re.compile(r"^(\d+)/(\d*)(\w+)$")
+QUOTA_PATTERN = re.compile(r"^(\d+)/(\w+)$")
 CACHE_KEY_FORMAT = "client_throttler:{}"
 CACHE_KEY_TIMEOUT = timedelta(hours=1)
 METRIC_KEY_FORMAT = "client_throttler_metric:{}"
+ADAPTIVE_KEY_FORMAT = "client_throttler_adaptive:{}"
+IN_FLIGHT_KEY_FORMAT = "client_throttler_in_flight:{}"
+SHARD_KEY_FORMAT = "client_throttler_nodes:{}"
+QUOTA_KEY_FORMAT = "client_throttler_quota:{}"
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
 
 
@@ -65,10 +70,53 @@ class TimeDurationUnit(Enum):
 
     @classmethod
     def get_unit_value(cls, unit_name: str) -> float:
-        for unit in cls:
-            if unit.name == unit_name:
-                return unit.value
-        raise ValueError(f"Invalid unit name: {unit_name}")
+        try:
+            return TIME_UNIT_ALIASES[unit_name].value
+        except KeyError:
+            raise ValueError(f"Invalid unit name: {unit_name}")
+
+
+TIME_UNIT_ALIASES = {
+    alias: unit
+    for unit, aliases in (
+        (TimeDurationUnit.NANOSECOND, ("ns", "nsec", "nanosecond", "nanoseconds")),
+        (TimeDurationUnit.MICROSECOND, ("us", "usec", "microsecond", "microseconds")),
+        (TimeDurationUnit.MILLISECOND, ("ms", "msec", "millisecond", "milliseconds")),
+        (TimeDurationUnit.SECOND, ("s", "sec", "second", "seconds")),
+        (TimeDurationUnit.MINUTE, ("m", "min", "minute", "minutes")),
+        (TimeDurationUnit.HOUR, ("h", "hr", "hour", "hours")),
+        (TimeDurationUnit.DAY, ("d", "day", "days")),
+        (TimeDurationUnit.YEAR, ("y", "yr", "year", "years")),
+    )
+    for alias in aliases
+}
+
+
+class CalendarUnit:
+    """
+    Calendar windows of a quota, aligned to the boundaries of the unit in the quota timezone
+    """
+
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+    MONTH = "month"
+    YEAR = "year"
+
+    choices = (MINUTE, HOUR, DAY, MONTH, YEAR)
+
+
+CALENDAR_UNIT_ALIASES = {
+    alias: unit
+    for unit, aliases in (
+        (CalendarUnit.MINUTE, ("m", "min", "minute", "minutes")),
+        (CalendarUnit.HOUR, ("h", "hr", "hour", "hours")),
+        (CalendarUnit.DAY, ("d", "day", "days")),
+        (CalendarUnit.MONTH, ("mo", "mon", "month", "months")),
+        (CalendarUnit.YEAR, ("y", "yr", "year", "years")),
+    )
+    for alias in aliases
+}
 
 
 class Unset:
@@ -84,3 +132,65 @@ class Defaults:
     enable_metric_record = False
     unit_value = 1
     placeholder_offset = TimeDurationUnit.YEAR.value
+    hooks = ()
+    enable_server_time = False
+    clock_sync_interval = TimeDurationUnit.MINUTE.value
+    failure_policy = "raise"
+    circuit_breaker_threshold = 0
+    circuit_breaker_cooldown = 30 * TimeDurationUnit.SECOND.value
+    fallback_nodes = 1
+    enable_adaptive_rate = False
+    adaptive_min_requests = 1
+    adaptive_increase = 1
+    adaptive_decrease_factor = 0.5
+    adaptive_sync_interval = TimeDurationUnit.SECOND.value
+    max_in_flight = 0
+    lease_timeout = TimeDurationUnit.MINUTE.value
+    in_flight_poll_interval = 100 * TimeDurationUnit.MILLISECOND.value
+    priority = 0
+    priority_shares = {}
+    enable_pacing = False
+    burst = 1
+    placeholder_timeout = TimeDurationUnit.MINUTE.value
+    compaction_margin = 0
+    enable_coalescing = False
+    coalesce_max_batch = 64
+    coalesce_max_delay = 200 * TimeDurationUnit.MICROSECOND.value
+    enable_sharding = False
+    shard_sync_interval = 5 * TimeDurationUnit.SECOND.value
+    node_timeout = 15 * TimeDurationUnit.SECOND.value
+    quota = ""
+    quota_timezone = timezone.utc
+    max_book_times = 10
+    rate_cache_size = 1024
+
+
+class FailurePolicy:
+    """
+    How to admit requests when redis fails
+
+    RAISE: raise the redis error
+    OPEN: admit every request without throttling
+    CLOSED: reject every request with BackendUnavailable
+    LOCAL: throttle locally with a 1/fallback_nodes share of the rate
+    """
+
+    RAISE = "raise"
+    OPEN = "open"
+    CLOSED = "closed"
+    LOCAL = "local"
+
+    choices = (RAISE, OPEN, CLOSED, LOCAL)
+
+
+class HookPoint:
+    """
+    Operations reported to hooks
+    """
+
+    GET_REQUEST_COUNT = "get_request_count"
+    GET_WAIT_TIME = "get_wait_time"
+    UPDATE_TIME = "update_time"
+    RECORD_METRIC = "record_metric"
+    SLEEP = "sleep"
+    DEGRADE = "degrade"
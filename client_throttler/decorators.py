@@ -23,6 +23,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import threading
 from functools import wraps
 
 from client_throttler.throttler import Throttler, ThrottlerConfig
@@ -30,11 +31,23 @@ from client_throttler.throttler import Throttler, ThrottlerConfig
 
 def throttler(config: ThrottlerConfig = None):
     def decorator(func):
+        # built on first call, so that setup() may run after decoration
+        instance = None
+        lock = threading.Lock()
+
+        def get_throttler() -> Throttler:
+            nonlocal instance
+            if instance is None:
+                with lock:
+                    if instance is None:
+                        instance = Throttler(config.copy(func=func))
+            return instance
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            config.func = func
-            return Throttler(config)(*args, **kwargs)
+            return get_throttler()(*args, **kwargs)
 
+        wrapper.get_throttler = get_throttler
         return wrapper
 
     config = config or ThrottlerConfig()
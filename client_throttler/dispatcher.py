@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import heapq
+import itertools
+import math
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from client_throttler.constants import TimeDurationUnit
+from client_throttler.exceptions import RetryTimeout
+from client_throttler.throttler import Throttler, new_tag
+
+
+@dataclass(order=True)
+class Job:
+    """
+    Pending call, jobs with higher priority run first, then earlier deadline, then earlier submission
+    """
+
+    sort_priority: int
+    deadline: float
+    sequence: int
+    tag: str = field(compare=False)
+    args: tuple = field(compare=False)
+    kwargs: dict = field(compare=False)
+    future: Future = field(compare=False)
+
+
+class Dispatcher:
+    """
+    Release throttled calls into a worker pool exactly when permits become available.
+
+    Pending calls wait in a priority queue and hold no thread, a single timer thread takes permits
+    with Throttler.acquire and sleeps until the next permit frees up.
+
+    :param throttler: Throttler whose func is called
+    :param executor: Executor running admitted calls, a ThreadPoolExecutor is created when not set
+    :param max_workers: Max workers of the created ThreadPoolExecutor
+    """
+
+    def __init__(
+        self,
+        throttler: Throttler,
+        executor: Executor = None,
+        max_workers: int = None,
+    ):
+        self.throttler = throttler
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="client_throttler_worker"
+        )
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._next_attempt = 0.0
+        self._shutdown = False
+        self._timer = threading.Thread(
+            target=self._dispatch, name="client_throttler_dispatcher", daemon=True
+        )
+        self._timer.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def submit(
+        self, *args, priority: int = 0, timeout: float = None, **kwargs
+    ) -> Future:
+        """
+        Queue a call of throttler.config.func
+        :param priority: Calls with higher priority are released first
+        :param timeout: Seconds the call may wait for a permit, max_retry_duration is used when not set,
+            the future fails with RetryTimeout once exceeded
+        :return: Future of the call result
+        """
+
+        timeout = (
+            timeout if timeout is not None else self.throttler.config.max_retry_duration
+        )
+        deadline = self.throttler.clock.monotonic() + timeout if timeout else math.inf
+        future = Future()
+        job = Job(
+            sort_priority=-priority,
+            deadline=deadline,
+            sequence=next(self._sequence),
+            tag=new_tag(),
+            args=args,
+            kwargs=kwargs,
+            future=future,
+        )
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            heapq.heappush(self._queue, job)
+            self._condition.notify()
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        """
+        Stop accepting calls, pending calls are still released unless cancel_pending is set.
+        Without wait, the timer thread shuts the created executor down once the queue is drained.
+        """
+
+        with self._condition:
+            self._shutdown = True
+            if cancel_pending:
+                for job in self._queue:
+                    job.future.cancel()
+                self._queue.clear()
+            self._condition.notify()
+        if not wait:
+            return
+        self._timer.join()
+        if self._own_executor:
+            self.executor.shutdown(wait=True)
+
+    def __enter__(self) -> "Dispatcher":
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:
+        self.shutdown()
+
+    def _next_job(self) -> Optional[Job]:
+        """
+        Wait for a job that is due for a permit
+        """
+
+        clock = self.throttler.clock
+        with self._condition:
+            while True:
+                if not self._queue:
+                    if self._shutdown:
+                        return None
+                    self._condition.wait()
+                    continue
+                job = self._queue[0]
+                now = clock.monotonic()
+                if job.future.cancelled():
+                    heapq.heappop(self._queue)
+                    continue
+                if job.deadline <= now:
+                    heapq.heappop(self._queue)
+                    job.future.set_exception(
+                        RetryTimeout(
+                            job.tag, clock.to_epoch(job.deadline), clock.to_epoch(now)
+                        )
+                    )
+                    continue
+                if now < self._next_attempt:
+                    self._condition.wait(min(self._next_attempt, job.deadline) - now)
+                    continue
+                return heapq.heappop(self._queue)
+
+    def _dispatch(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                if self._own_executor:
+                    self.executor.shutdown(wait=False)
+                return
+            try:
+                result = self.throttler.acquire(job.tag)
+            except Exception as err:
+                job.future.set_exception(err)
+                continue
+            if result.allowed:
+                try:
+                    self.executor.submit(self._run, job)
+                except RuntimeError as err:
+                    # the given executor was shut down
+                    job.future.set_exception(err)
+                continue
+            with self._condition:
+                # step past the millisecond the window keeps for boundary requests
+                self._next_attempt = self.throttler.clock.monotonic() + (
+                    result.retry_after + TimeDurationUnit.MILLISECOND.value
+                    if result.retry_after
+                    else self.throttler.to_wait_time(0)
+                )
+                heapq.heappush(self._queue, job)
+
+    def _run(self, job: Job) -> None:
+        try:
+            if not job.future.set_running_or_notify_cancel():
+                return
+            try:
+                job.future.set_result(self.throttler.call(*job.args, **job.kwargs))
+            except BaseException as err:
+                job.future.set_exception(err)
+        finally:
+            self.throttler.release(job.tag)
@@ -88,3 +88,70 @@ class RateParseError(SDKException):
         super().__init__(error_message, error_code)
         self.rate = rate
         self.error_message = self.error_message.format(rate=rate)
+
+
+class ConfigFrozenError(SDKException):
+    error_code = "config_frozen"
+    error_message = (
+        "config can not be changed after the throttler is created, field: {field}"
+    )
+
+    def __init__(self, field: str, error_message=None, error_code=None):
+        super().__init__(error_message, error_code)
+        self.field = field
+        self.error_message = self.error_message.format(field=field)
+
+
+class ConnectionPoolTooSmall(SDKException):
+    error_code = "connection_pool_too_small"
+    error_message = (
+        "redis connection pool is smaller than the expected concurrency, "
+        "max_connections: {max_connections}, expected_concurrency: {expected_concurrency}"
+    )
+
+    def __init__(
+        self,
+        max_connections: int,
+        expected_concurrency: int,
+        error_message=None,
+        error_code=None,
+    ):
+        super().__init__(error_message, error_code)
+        self.max_connections = max_connections
+        self.expected_concurrency = expected_concurrency
+        self.error_message = self.error_message.format(
+            max_connections=max_connections, expected_concurrency=expected_concurrency
+        )
+
+
+class ConfigError(SDKException):
+    error_code = "config_error"
+    error_message = "invalid config, {field}: {value}"
+
+    def __init__(self, field: str, value, error_message=None, error_code=None):
+        super().__init__(error_message, error_code)
+        self.field = field
+        self.value = value
+        self.error_message = self.error_message.format(field=field, value=value)
+
+
+class BackendUnavailable(SDKException):
+    error_code = "backend_unavailable"
+    error_message = (
+        "redis is unavailable and the failure policy rejects requests, key: {key}"
+    )
+
+    def __init__(self, key: str, error_message=None, error_code=None):
+        super().__init__(error_message, error_code)
+        self.key = key
+        self.error_message = self.error_message.format(key=key)
+
+
+class UpstreamThrottled(SDKException):
+    error_code = "upstream_throttled"
+    error_message = "upstream throttled the request, retry_after: {retry_after}"
+
+    def __init__(self, retry_after: float = None, error_message=None, error_code=None):
+        super().__init__(error_message, error_code)
+        self.retry_after = retry_after
+        self.error_message = self.error_message.format(retry_after=retry_after)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from client_throttler.exceptions import ConfigError
+from client_throttler.throttler import (
+    BACKEND_ERRORS,
+    AcquireResult,
+    Throttler,
+    new_tag,
+)
+
+
+@dataclass
+class GroupResult:
+    """
+    Outcome of taking a permit of every throttler in a group
+
+    :param allowed: Whether every permit is taken
+    :param results: Result of each throttler, in group order
+    """
+
+    allowed: bool
+    results: List[AcquireResult]
+
+    @property
+    def retry_after(self) -> float:
+        return max(
+            (result.retry_after for result in self.results if not result.allowed),
+            default=0,
+        )
+
+
+class ThrottlerGroup:
+    """
+    Take permits of several throttlers sharing a redis client in two round trips, whatever their number:
+    one to take a placeholder in every limit, one to keep the admitted placeholders and drop the others.
+    Every throttler needs a rate, quotas are counted on top of it, and node sharding is not supported.
+
+    :param throttlers: Throttlers of the group
+    :param all_or_nothing: Whether to drop every permit unless all of them are taken
+    """
+
+    def __init__(self, throttlers: Sequence[Throttler], all_or_nothing: bool = False):
+        if not throttlers:
+            raise ConfigError("throttlers", throttlers)
+        redis_client = throttlers[0].config.redis_client
+        for throttler in throttlers:
+            if throttler.config.redis_client is not redis_client:
+                raise ConfigError("redis_client", throttler.config.redis_client)
+            # permits are taken in the request log, quota-only throttlers do not keep one
+            if not throttler.config.rate:
+                raise ConfigError("rate", throttler.config.rate)
+            # sharded throttlers admit from a local share, which the group would bypass
+            if throttler.config.enable_sharding:
+                raise ConfigError("enable_sharding", throttler.config.enable_sharding)
+        self.throttlers = list(throttlers)
+        self.all_or_nothing = all_or_nothing
+
+    def try_acquire(self) -> GroupResult:
+        """
+        Try to take a permit of every throttler without blocking
+        """
+
+        tags = [new_tag() for _ in self.throttlers]
+        results: Dict[int, AcquireResult] = {}
+        pending = []
+        for index, (throttler, tag) in enumerate(zip(self.throttlers, tags)):
+            if throttler.breaker is not None and not throttler.breaker.allow():
+                results[index] = throttler.degrade(tag)
+                continue
+            # the server clock and the adaptive pause may be read from redis
+            try:
+                pause = throttler.get_pause(throttler.clock.time())
+            except BACKEND_ERRORS as err:
+                results[index] = self.degrade(index, tag, err)
+                continue
+            if pause:
+                if throttler.breaker is not None:
+                    throttler.breaker.record_success()
+                results[index] = AcquireResult(
+                    allowed=False, retry_after=pause, tag=tag, paused=True
+                )
+                continue
+            pending.append(index)
+        if pending:
+            try:
+                results.update(self.acquire_with_redis(pending, tags, results))
+            except BACKEND_ERRORS as err:
+                for index in pending:
+                    results[index] = self.degrade(index, tags[index], err)
+            else:
+                for index in pending:
+                    if self.throttlers[index].breaker is not None:
+                        self.throttlers[index].breaker.record_success()
+        ordered = [results[index] for index in range(len(self.throttlers))]
+        return GroupResult(
+            allowed=all(result.allowed for result in ordered), results=ordered
+        )
+
+    def degrade(self, index: int, tag: str, error: Exception) -> AcquireResult:
+        """
+        Record the redis failure of a throttler and admit its request according to its failure policy
+        :param index: Index of the throttler
+        :param tag: Request tag
+        :param error: Redis error
+        """
+
+        throttler = self.throttlers[index]
+        if throttler.breaker is not None:
+            throttler.breaker.record_failure()
+        return throttler.degrade(tag, error)
+
+    def acquire_with_redis(
+        self, pending: List[int], tags: List[str], results: Dict[int, AcquireResult]
+    ) -> Dict[int, AcquireResult]:
+        """
+        Take the permits of the pending throttlers with the requests recorded in redis
+        :param pending: Indexes of the throttlers checked in redis
+        :param tags: Request tag of each throttler
+        :param results: Results of the throttlers decided without redis
+        """
+
+        nows = {index: self.throttlers[index].clock.time() for index in pending}
+        with self.throttlers[0]._get_pipline() as pipe:
+            sizes = [
+                self.throttlers[index].queue_admission(
+                    pipe,
+                    nows[index] - self.throttlers[index].config.interval,
+                    tags[index],
+                    nows[index],
+                )
+                for index in pending
+            ]
+            outputs = pipe.execute()
+        admissions, offset = {}, 0
+        for index, size in zip(pending, sizes):
+            admissions[index] = self.throttlers[index].parse_admission(
+                outputs[offset : offset + size]
+            )
+            offset += size
+        for index in pending:
+            if self.throttlers[index].is_oversized(admissions[index]):
+                self.throttlers[index].trim(nows[index])
+        admitted = {
+            index: self.throttlers[index].is_admitted(admissions[index])
+            for index in pending
+        }
+        keep_all = all(admitted.values()) and all(
+            result.allowed for result in results.values()
+        )
+
+        # keep the placeholders of admitted requests, drop the others
+        kept = {
+            index: admitted[index] and (keep_all or not self.all_or_nothing)
+            for index in pending
+        }
+        with self.throttlers[0]._get_pipline() as pipe:
+            sizes = []
+            for index in pending:
+                throttler = self.throttlers[index]
+                if kept[index]:
+                    pipe.zadd(
+                        throttler.config.cache_key,
+                        {tags[index]: throttler.clock.time()},
+                    )
+                    sizes.append(1)
+                else:
+                    sizes.append(
+                        throttler.queue_retry_after(
+                            pipe,
+                            nows[index] - throttler.config.interval,
+                            nows[index],
+                            tags[index],
+                        )
+                    )
+            outputs = pipe.execute()
+
+        decided, offset = {}, 0
+        for index, size in zip(pending, sizes):
+            throttler, admission = self.throttlers[index], admissions[index]
+            if kept[index]:
+                throttler.record_metric(admission.count)
+                decided[index] = AcquireResult(
+                    allowed=True,
+                    remaining=max(0, throttler.max_requests - admission.count),
+                    tag=tags[index],
+                )
+            elif admitted[index]:
+                # rolled back because another permit was not taken
+                decided[index] = AcquireResult(allowed=False, tag=tags[index])
+            else:
+                decided[index] = AcquireResult(
+                    allowed=False,
+                    retry_after=throttler.parse_retry_after(
+                        outputs[offset : offset + size], nows[index], admission
+                    ),
+                    tag=tags[index],
+                )
+            offset += size
+        return decided
+
+    def release(self, result: GroupResult) -> None:
+        """
+        Release the in-flight leases taken by try_acquire
+        """
+
+        for throttler, acquired in zip(self.throttlers, result.results):
+            if acquired.allowed:
+                throttler.release(acquired.tag)
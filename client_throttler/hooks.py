@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import logging
+import time
+import types
+from dataclasses import asdict, dataclass, is_dataclass
+from functools import wraps
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HookEvent:
+    """
+    Timing and outcome of an instrumented operation
+
+    :param name: Name of the operation, one of HookPoint
+    :param key: Cache key of the throttler
+    :param start_time: Timestamp when the operation started
+    :param duration: Time spent in the operation (seconds)
+    :param result: Value returned by the operation
+    :param error: Exception raised by the operation
+    """
+
+    name: str
+    key: str
+    start_time: float
+    duration: float
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+def emit(hooks, event: HookEvent) -> None:
+    """
+    Deliver an event to every hook, a broken hook never breaks the throttled call
+    """
+
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("[ClientThrottler] hook %r failed on %s", hook, event.name)
+
+
+def instrument(name: str) -> callable:
+    """
+    Report the timing and outcome of a Throttler method to config.hooks.
+    Instances without hooks bind the undecorated methods, see bind_uninstrumented.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            hooks = self.config.hooks
+            if not hooks:
+                return func(self, *args, **kwargs)
+            start_time = time.time()
+            start = time.perf_counter()
+            try:
+                result = func(self, *args, **kwargs)
+            except Exception as err:
+                emit(
+                    hooks,
+                    HookEvent(
+                        name=name,
+                        key=self.config.cache_key,
+                        start_time=start_time,
+                        duration=time.perf_counter() - start,
+                        error=err,
+                    ),
+                )
+                raise
+            emit(
+                hooks,
+                HookEvent(
+                    name=name,
+                    key=self.config.cache_key,
+                    start_time=start_time,
+                    duration=time.perf_counter() - start,
+                    result=result,
+                ),
+            )
+            return result
+
+        wrapper.hook_point = name
+        return wrapper
+
+    return decorator
+
+
+def bind_uninstrumented(instance) -> None:
+    """
+    Bind the undecorated instrumented methods to an instance without hooks, so that its calls skip the wrappers
+    """
+
+    cls = type(instance)
+    for attr in dir(cls):
+        method = getattr(cls, attr, None)
+        if getattr(method, "hook_point", None) is not None:
+            setattr(instance, attr, types.MethodType(method.__wrapped__, instance))
+
+
+class OpenTelemetryHook:
+    """
+    Export hook events as OpenTelemetry spans
+
+    :param tracer: opentelemetry.trace.Tracer
+    :param prefix: Prefix of span names
+    """
+
+    def __init__(self, tracer, prefix: str = "client_throttler"):
+        self.tracer = tracer
+        self.prefix = prefix
+
+    def __call__(self, event: HookEvent) -> None:
+        start_ns = int(event.start_time * 1e9)
+        attributes = {"client_throttler.key": event.key}
+        if isinstance(event.result, (int, float)):
+            attributes["client_throttler.result"] = event.result
+        elif is_dataclass(event.result):
+            for name, value in asdict(event.result).items():
+                if isinstance(value, (int, float)):
+                    attributes[f"client_throttler.{name}"] = value
+        span = self.tracer.start_span(
+            f"{self.prefix}.{event.name}", start_time=start_ns, attributes=attributes
+        )
+        if event.error is not None:
+            span.record_exception(event.error)
+        span.end(end_time=start_ns + int(event.duration * 1e9))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class LocalRateLimiter:
+    """
+    In-process sliding log limiter, used when redis is not available or not needed
+
+    :param max_requests: Max requests in the interval
+    :param interval: Interval (seconds)
+    :param clock: Monotonic clock (seconds)
+    """
+
+    def __init__(
+        self, max_requests: int, interval: float, clock: callable = time.monotonic
+    ):
+        self.max_requests = max_requests
+        self.interval = interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._requests = deque()
+
+    def acquire(self) -> float:
+        """
+        Try to take a permit
+        :return: Wait time (seconds), 0 when the permit is taken
+        """
+
+        with self._lock:
+            now = self.clock()
+            start_time = now - self.interval
+            while self._requests and self._requests[0] <= start_time:
+                self._requests.popleft()
+            if len(self._requests) < self.max_requests:
+                self._requests.append(now)
+                return 0
+            if not self._requests:
+                return self.interval
+            return self._requests[0] + self.interval - now
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
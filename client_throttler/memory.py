@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from client_throttler.redis import MockPipeline
+
+KeyT = Union[str, bytes]
+
+
+def decode(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def parse_score_bound(value: Any) -> Tuple[float, bool]:
+    """
+    Parse a redis score bound, eg: 1.5, "-inf", "+inf", "(1.5"
+    :return: score, whether the bound is exclusive
+    """
+
+    if isinstance(value, (int, float)):
+        return float(value), False
+    value = decode(value)
+    if value.startswith("("):
+        return float(value[1:]), True
+    return float(value), False
+
+
+def to_seconds(timeout: Union[int, float, timedelta]) -> float:
+    if isinstance(timeout, timedelta):
+        return timeout.total_seconds()
+    return float(timeout)
+
+
+class SortedSet:
+    """
+    Sorted set kept in two parallel lists ordered by (score, member),
+    so that lookups by score are bisect searches instead of full scans.
+    """
+
+    __slots__ = ("_member_scores", "_scores", "_members")
+
+    def __init__(self) -> None:
+        self._member_scores: Dict[str, float] = {}
+        self._scores: List[float] = []
+        self._members: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, member: str) -> Optional[float]:
+        return self._member_scores.get(member)
+
+    def _index(self, member: str, score: float) -> int:
+        lo = bisect_left(self._scores, score)
+        hi = bisect_right(self._scores, score, lo)
+        return bisect_left(self._members, member, lo, hi)
+
+    def add(self, member: str, score: float) -> int:
+        old_score = self._member_scores.get(member)
+        if old_score is not None:
+            if old_score == score:
+                return 0
+            index = self._index(member, old_score)
+            del self._scores[index]
+            del self._members[index]
+        self._member_scores[member] = score
+        index = self._index(member, score)
+        self._scores.insert(index, score)
+        self._members.insert(index, member)
+        return int(old_score is None)
+
+    def remove(self, member: str) -> int:
+        score = self._member_scores.pop(member, None)
+        if score is None:
+            return 0
+        index = self._index(member, score)
+        del self._scores[index]
+        del self._members[index]
+        return 1
+
+    def _bounds(self, min_score: Any, max_score: Any) -> Tuple[int, int]:
+        min_value, min_exclusive = parse_score_bound(min_score)
+        max_value, max_exclusive = parse_score_bound(max_score)
+        if min_exclusive:
+            lo = bisect_right(self._scores, min_value)
+        else:
+            lo = bisect_left(self._scores, min_value)
+        if max_exclusive:
+            hi = bisect_left(self._scores, max_value, lo)
+        else:
+            hi = bisect_right(self._scores, max_value, lo)
+        return lo, max(lo, hi)
+
+    def count(self, min_score: Any, max_score: Any) -> int:
+        lo, hi = self._bounds(min_score, max_score)
+        return hi - lo
+
+    def remove_range_by_score(self, min_score: Any, max_score: Any) -> int:
+        lo, hi = self._bounds(min_score, max_score)
+        return self._remove_slice(lo, hi)
+
+    def remove_range_by_rank(self, start: int, end: int) -> int:
+        lo, hi = self._rank_bounds(start, end)
+        return self._remove_slice(lo, hi)
+
+    def _remove_slice(self, lo: int, hi: int) -> int:
+        for member in self._members[lo:hi]:
+            del self._member_scores[member]
+        del self._scores[lo:hi]
+        del self._members[lo:hi]
+        return hi - lo
+
+    def _rank_bounds(self, start: int, end: int) -> Tuple[int, int]:
+        size = len(self._scores)
+        if start < 0:
+            start = max(0, size + start)
+        if end < 0:
+            end = size + end
+        end = min(end, size - 1)
+        return start, max(start, end + 1)
+
+    def range_by_score(
+        self,
+        min_score: Any,
+        max_score: Any,
+        start: int = 0,
+        num: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        lo, hi = self._bounds(min_score, max_score)
+        lo = lo + (start or 0)
+        if num is not None and num >= 0:
+            hi = min(hi, lo + num)
+        return list(zip(self._members[lo:hi], self._scores[lo:hi]))
+
+    def rev_range_by_score(
+        self,
+        max_score: Any,
+        min_score: Any,
+        start: int = 0,
+        num: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        lo, hi = self._bounds(min_score, max_score)
+        hi = hi - (start or 0)
+        if num is not None and num >= 0:
+            lo = max(lo, hi - num)
+        if hi <= lo:
+            return []
+        return list(zip(self._members[lo:hi], self._scores[lo:hi]))[::-1]
+
+    def range_by_rank(self, start: int, end: int) -> List[Tuple[str, float]]:
+        lo, hi = self._rank_bounds(start, end)
+        return list(zip(self._members[lo:hi], self._scores[lo:hi]))
+
+
+class InMemoryRedisClient:
+    """
+    Thread-safe in-process stand-in for the redis commands used by client_throttler.
+
+    Commands run one at a time under a lock, like a single-threaded redis server.
+    Sorted sets are indexed with bisect, so window trimming and range queries cost O(log n)
+    lookups plus the number of touched members. Keys with a timeout expire lazily on access.
+
+    :param clock: Monotonic clock (seconds) used for key expiry
+    :param wall_clock: Clock (timestamp) returned by TIME
+    """
+
+    def __init__(
+        self, clock: callable = time.monotonic, wall_clock: callable = time.time
+    ) -> None:
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+
+    # connection
+
+    def ping(self, **kwargs: Any) -> bool:
+        return True
+
+    def pipeline(self, transaction: bool = False) -> MockPipeline:
+        return MockPipeline(self)
+
+    def time(self) -> Tuple[int, int]:
+        seconds, fraction = divmod(self._wall_clock(), 1)
+        return int(seconds), int(fraction * 1e6)
+
+    # keyspace
+
+    def _expired(self, key: str) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is None or deadline > self._clock():
+            return False
+        self._expires.pop(key, None)
+        self._data.pop(key, None)
+        return True
+
+    def _get(self, key: KeyT) -> Any:
+        key = decode(key)
+        if self._expired(key):
+            return None
+        return self._data.get(key)
+
+    def _get_zset(self, key: KeyT) -> SortedSet:
+        key = decode(key)
+        zset = self._get(key)
+        if zset is None:
+            zset = self._data[key] = SortedSet()
+        return zset
+
+    def _cleanup(self, key: KeyT) -> None:
+        key = decode(key)
+        value = self._data.get(key)
+        if value is not None and not len(value):
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def exists(self, *keys: KeyT) -> int:
+        with self._lock:
+            return sum(self._get(key) is not None for key in keys)
+
+    def delete(self, *keys: KeyT) -> int:
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                key = decode(key)
+                deleted += int(self._get(key) is not None)
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return deleted
+
+    def keys(self, pattern: KeyT = "*") -> List[bytes]:
+        pattern = decode(pattern)
+        with self._lock:
+            return [
+                key.encode()
+                for key in list(self._data)
+                if not self._expired(key) and fnmatchcase(key, pattern)
+            ]
+
+    def scan_iter(self, match: KeyT = None, count: int = None) -> Iterator[bytes]:
+        # keys are listed at once, count only bounds the batches of a redis server
+        yield from self.keys(match or "*")
+
+    def expire(self, key: KeyT, timeout: Union[int, float, timedelta]) -> bool:
+        with self._lock:
+            key = decode(key)
+            if self._get(key) is None:
+                return False
+            self._expires[key] = self._clock() + to_seconds(timeout)
+            return True
+
+    def expireat(self, key: KeyT, when: Union[int, float, datetime]) -> bool:
+        if isinstance(when, datetime):
+            when = when.timestamp()
+        with self._lock:
+            key = decode(key)
+            if self._get(key) is None:
+                return False
+            self._expires[key] = self._clock() + when - self._wall_clock()
+            return True
+
+    def ttl(self, key: KeyT) -> int:
+        with self._lock:
+            key = decode(key)
+            if self._get(key) is None:
+                return -2
+            deadline = self._expires.get(key)
+            if deadline is None:
+                return -1
+            return max(0, round(deadline - self._clock()))
+
+    def flushall(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            return True
+
+    # string
+
+    def get(self, key: KeyT) -> Optional[bytes]:
+        with self._lock:
+            value = self._get(key)
+            return None if value is None else str(value).encode()
+
+    def incrby(self, key: KeyT, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self._get(key) or 0) + amount
+            self._data[decode(key)] = value
+            return value
+
+    def incr(self, key: KeyT, amount: int = 1) -> int:
+        return self.incrby(key, amount)
+
+    def decr(self, key: KeyT, amount: int = 1) -> int:
+        return self.incrby(key, -amount)
+
+    # hash
+
+    def _get_hash(self, key: KeyT) -> Dict[str, bytes]:
+        key = decode(key)
+        value = self._get(key)
+        if value is None:
+            value = self._data[key] = {}
+        return value
+
+    def hset(
+        self,
+        key: KeyT,
+        field: KeyT = None,
+        value: Any = None,
+        mapping: Dict[KeyT, Any] = None,
+    ) -> int:
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        with self._lock:
+            value = self._get_hash(key)
+            added = 0
+            for item_field, item_value in items.items():
+                item_field = decode(item_field)
+                added += int(item_field not in value)
+                value[item_field] = str(item_value).encode()
+            return added
+
+    def hget(self, key: KeyT, field: KeyT) -> Optional[bytes]:
+        with self._lock:
+            value = self._get(key)
+            return value.get(decode(field)) if value is not None else None
+
+    def hmget(self, key: KeyT, *fields: KeyT) -> List[Optional[bytes]]:
+        if len(fields) == 1 and isinstance(fields[0], (list, tuple)):
+            fields = fields[0]
+        with self._lock:
+            value = self._get(key) or {}
+            return [value.get(decode(field)) for field in fields]
+
+    def hgetall(self, key: KeyT) -> Dict[bytes, bytes]:
+        with self._lock:
+            value = self._get(key) or {}
+            return {field.encode(): item for field, item in value.items()}
+
+    def hincrbyfloat(self, key: KeyT, field: KeyT, amount: float = 1.0) -> float:
+        with self._lock:
+            value = self._get_hash(key)
+            field = decode(field)
+            result = float(value.get(field, 0)) + amount
+            value[field] = repr(result).encode()
+            return result
+
+    # sorted set
+
+    def zadd(self, key: KeyT, mapping: Dict[KeyT, float]) -> int:
+        with self._lock:
+            zset = self._get_zset(key)
+            return sum(
+                zset.add(decode(member), float(score))
+                for member, score in mapping.items()
+            )
+
+    def zrem(self, key: KeyT, *members: KeyT) -> int:
+        with self._lock:
+            zset = self._get(key)
+            if zset is None:
+                return 0
+            removed = sum(zset.remove(decode(member)) for member in members)
+            self._cleanup(key)
+            return removed
+
+    def zcard(self, key: KeyT) -> int:
+        with self._lock:
+            zset = self._get(key)
+            return len(zset) if zset is not None else 0
+
+    def zcount(self, key: KeyT, min_score: Any, max_score: Any) -> int:
+        with self._lock:
+            zset = self._get(key)
+            return zset.count(min_score, max_score) if zset is not None else 0
+
+    def zscore(self, key: KeyT, member: KeyT) -> Optional[float]:
+        with self._lock:
+            zset = self._get(key)
+            return zset.score(decode(member)) if zset is not None else None
+
+    def zremrangebyscore(self, key: KeyT, min_score: Any, max_score: Any) -> int:
+        with self._lock:
+            zset = self._get(key)
+            if zset is None:
+                return 0
+            removed = zset.remove_range_by_score(min_score, max_score)
+            self._cleanup(key)
+            return removed
+
+    def zremrangebyrank(self, key: KeyT, start: int, end: int) -> int:
+        with self._lock:
+            zset = self._get(key)
+            if zset is None:
+                return 0
+            removed = zset.remove_range_by_rank(start, end)
+            self._cleanup(key)
+            return removed
+
+    def zrangebyscore(
+        self,
+        key: KeyT,
+        min_score: Any,
+        max_score: Any,
+        start: int = 0,
+        num: Optional[int] = None,
+        withscores: bool = False,
+    ) -> Union[List[bytes], List[Tuple[bytes, float]]]:
+        with self._lock:
+            zset = self._get(key)
+            items = (
+                zset.range_by_score(min_score, max_score, start, num)
+                if zset is not None
+                else []
+            )
+        return self._format_items(items, withscores)
+
+    def zrevrangebyscore(
+        self,
+        key: KeyT,
+        max_score: Any,
+        min_score: Any,
+        start: int = 0,
+        num: Optional[int] = None,
+        withscores: bool = False,
+    ) -> Union[List[bytes], List[Tuple[bytes, float]]]:
+        with self._lock:
+            zset = self._get(key)
+            items = (
+                zset.rev_range_by_score(max_score, min_score, start, num)
+                if zset is not None
+                else []
+            )
+        return self._format_items(items, withscores)
+
+    def zrange(
+        self, key: KeyT, start: int, end: int, withscores: bool = False
+    ) -> Union[List[bytes], List[Tuple[bytes, float]]]:
+        with self._lock:
+            zset = self._get(key)
+            items = zset.range_by_rank(start, end) if zset is not None else []
+        return self._format_items(items, withscores)
+
+    @staticmethod
+    def _format_items(
+        items: List[Tuple[str, float]], withscores: bool
+    ) -> Union[List[bytes], List[Tuple[bytes, float]]]:
+        if withscores:
+            return [(member.encode(), score) for member, score in items]
+        return [member.encode() for member, _ in items]
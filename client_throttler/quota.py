@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+from client_throttler.constants import (
+    CACHE_KEY_TIMEOUT,
+    CALENDAR_UNIT_ALIASES,
+    QUOTA_PATTERN,
+    CalendarUnit,
+    Defaults,
+)
+from client_throttler.exceptions import RateParseError
+
+
+class Quota(NamedTuple):
+    """
+    Parsed quota, max_requests in every calendar window of unit
+    """
+
+    max_requests: int
+    unit: str
+
+
+@lru_cache(maxsize=Defaults.rate_cache_size)
+def parse_quota(quota: str) -> Quota:
+    """
+    Parse a quota string such as 10000/day or 1000/month, results are memoized
+    """
+
+    match = QUOTA_PATTERN.match(str(quota))
+    if not match:
+        raise RateParseError(quota)
+
+    unit = CALENDAR_UNIT_ALIASES.get(match.group(2))
+    if unit is None:
+        raise RateParseError(quota)
+    return Quota(int(match.group(1)), unit)
+
+
+def get_window(unit: str, now: float, timezone: tzinfo) -> Tuple[float, float]:
+    """
+    Get the calendar window containing now
+    :param unit: One of CalendarUnit
+    :param now: Current timestamp
+    :param timezone: Timezone of the calendar
+    :return: Start timestamp, end timestamp
+    """
+
+    moment = datetime.fromtimestamp(now, timezone)
+    if unit == CalendarUnit.MINUTE:
+        start = moment.replace(second=0, microsecond=0)
+        end = start + timedelta(minutes=1)
+    elif unit == CalendarUnit.HOUR:
+        start = moment.replace(minute=0, second=0, microsecond=0)
+        end = start + timedelta(hours=1)
+    elif unit == CalendarUnit.DAY:
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = start + timedelta(days=1)
+    elif unit == CalendarUnit.MONTH:
+        start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if start.month == 12:
+            end = start.replace(year=start.year + 1, month=1)
+        else:
+            end = start.replace(month=start.month + 1)
+    else:
+        start = moment.replace(
+            month=1, day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        end = start.replace(year=start.year + 1)
+    return start.timestamp(), end.timestamp()
+
+
+def get_window_key(key: str, start: float) -> str:
+    """
+    Counter key of the window starting at start, each window counts in its own key
+    """
+
+    return f"{key}:{int(start)}"
+
+
+def get_window_expiry(end: float) -> int:
+    """
+    Timestamp at which the counter of a window expires,
+    kept a while after the window ends for nodes whose clock lags behind
+    """
+
+    return math.ceil(end) + CACHE_KEY_TIMEOUT.seconds
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from client_throttler.constants import RATE_PATTERN, TIME_UNIT_ALIASES, Defaults
+from client_throttler.exceptions import RateParseError
+
+
+class Rate(NamedTuple):
+    """
+    Parsed rate, max_requests in every interval (seconds)
+    """
+
+    max_requests: int
+    interval: float
+
+
+@lru_cache(maxsize=Defaults.rate_cache_size)
+def parse_rate(rate: str) -> Rate:
+    """
+    Parse a rate string such as 1/s, 100/min or 20/5sec, results are memoized
+    """
+
+    match = RATE_PATTERN.match(str(rate))
+    if not match:
+        raise RateParseError(rate)
+
+    value = float(match.group(2) or Defaults.unit_value)
+    unit = TIME_UNIT_ALIASES.get(match.group(3))
+    if unit is None:
+        raise RateParseError(rate)
+    return Rate(int(match.group(1)), value * unit.value)
@@ -23,11 +23,103 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from redis import Redis
+import inspect
+from functools import partial
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+
+def create_redis_client(url: str, max_connections: int, **kwargs) -> "Redis":
+    """
+    Create a redis client whose pool holds up to max_connections connections.
+    Threads beyond that wait for a free connection instead of failing.
+    :param url: Redis url, eg: redis://localhost:6379/0
+    :param max_connections: Number of threads expected to use the client at once
+    """
+
+    from redis import BlockingConnectionPool, Redis
+
+    pool = BlockingConnectionPool.from_url(
+        url, max_connections=max_connections, **kwargs
+    )
+    return Redis(connection_pool=pool)
+
+
+def get_connection_args(pool) -> tuple:
+    """
+    Arguments of pool.get_connection, redis-py before 5.3 requires the command name and later versions deprecate it
+    """
+
+    try:
+        parameter = inspect.signature(pool.get_connection).parameters.get(
+            "command_name"
+        )
+    except (TypeError, ValueError):
+        return ("PING",)
+    if parameter is None or parameter.default is not inspect.Parameter.empty:
+        return ()
+    return ("PING",)
+
+
+def warmup_connections(redis_client: "Redis", connections: int = 1) -> None:
+    """
+    Open pooled connections ahead of the first requests, so that they do not pay connection setup.
+    Clients without a connection pool are pinged.
+    :param redis_client: Redis Client
+    :param connections: Number of connections to open, capped by the pool size
+    """
+
+    pool = getattr(redis_client, "connection_pool", None)
+    if pool is None:
+        redis_client.ping()
+        return
+    connections = min(connections, getattr(pool, "max_connections", connections))
+    args = get_connection_args(pool)
+    opened = []
+    try:
+        # hold the connections at once, so that the pool creates a new one each time
+        for _ in range(max(1, connections)):
+            connection = pool.get_connection(*args)
+            opened.append(connection)
+            connection.send_command("PING")
+            connection.read_response()
+    finally:
+        for connection in opened:
+            pool.release(connection)
+
+
+# commands queued by the throttler, bound as methods so queueing allocates no command objects
+PIPELINE_COMMANDS = (
+    "decr",
+    "exists",
+    "expire",
+    "expireat",
+    "get",
+    "hincrbyfloat",
+    "hmget",
+    "hset",
+    "incr",
+    "zadd",
+    "zcard",
+    "zcount",
+    "zrangebyscore",
+    "zrem",
+    "zremrangebyrank",
+    "zremrangebyscore",
+)
 
 
 class MockPipeline:
-    def __init__(self, client: Redis):
+    """
+    Pipeline for clients without pipeline support, runs queued commands one by one on execute.
+    Commands are kept as (name, args, kwargs) tuples.
+    """
+
+    __slots__ = ("_client", "_commands")
+
+    def __init__(self, client: "Redis"):
         self._client = client
         self._commands = []
 
@@ -38,44 +130,39 @@ class MockPipeline:
         return
 
     def __getattr__(self, func_name):
-        return MockCommand(pipeline=self, func_name=func_name)
+        if func_name.startswith("_"):
+            raise AttributeError(func_name)
+        return partial(self.queue, func_name)
 
-    def _reset(self):
-        self._commands = []
+    def queue(self, func_name: str, *args, **kwargs) -> "MockPipeline":
+        self._commands.append((func_name, args, kwargs))
+        return self
+
+    def __len__(self) -> int:
+        return len(self._commands)
 
     def execute(self, raise_on_error: bool = True) -> list:
+        commands, self._commands = self._commands, []
+        client = self._client
         results = []
-        for command in self._commands:
+        for func_name, args, kwargs in commands:
             try:
-                result = command.execute()
+                results.append(getattr(client, func_name)(*args, **kwargs))
             except Exception as err:
-                result = err
                 if raise_on_error:
-                    self._reset()
                     raise err
-            results.append(result)
-        self._reset()
+                results.append(err)
         return results
 
-    def add_command(self, func: "MockCommand") -> None:
-        self._commands.append(func)
-
-    def redis_func(self, func_name: str) -> callable:
-        return getattr(self._client, func_name)
 
+def _queue_command(func_name: str) -> callable:
+    def queue(self, *args, **kwargs) -> MockPipeline:
+        self._commands.append((func_name, args, kwargs))
+        return self
 
-class MockCommand:
-    def __init__(self, pipeline: MockPipeline, func_name: str):
-        self.pipeline = pipeline
-        self.func = self.pipeline.redis_func(func_name)
-        self.args = tuple()
-        self.kwargs = dict()
+    queue.__name__ = func_name
+    return queue
 
-    def __call__(self, *args, **kwargs) -> "MockCommand":
-        self.args = args
-        self.kwargs = kwargs
-        self.pipeline.add_command(self)
-        return self
 
-    def execute(self) -> any:
-        return self.func(*self.args, **self.kwargs)
+for _func_name in PIPELINE_COMMANDS:
+    setattr(MockPipeline, _func_name, _queue_command(_func_name))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import logging
+import math
+import threading
+import uuid
+
+from client_throttler.clock import LocalClock
+from client_throttler.configs import ThrottlerConfig
+from client_throttler.local import LocalRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class NodeShard:
+    """
+    Share of the rate enforced locally by one node, with no redis on the hot path.
+
+    Every node registers a heartbeat in a sorted set scored by time, and counts the nodes
+    that sent one within node_timeout, at most once per shard_sync_interval.
+    The node then admits max_requests / live nodes per interval in process, so the global rate is approximate:
+    it is exceeded while a node joins or dies, until the other nodes sync.
+    With more nodes than max_requests, each node admits one request per longer interval.
+
+    :param config: Frozen ThrottlerConfig
+    :param clock: Clock of the throttler
+    :param get_pipeline: Pipeline factory of the throttler
+    """
+
+    def __init__(
+        self, config: ThrottlerConfig, clock: LocalClock, get_pipeline: callable
+    ):
+        self.config = config
+        self.clock = clock
+        self.get_pipeline = get_pipeline
+        # uuid1 embeds the node, as in metric tags, and is unique per throttler
+        self.node_id = str(uuid.uuid1())
+        self.limiter = LocalRateLimiter(
+            config.max_requests, config.interval, clock.monotonic
+        )
+        self._lock = threading.Lock()
+        self._live_nodes = 1
+        self._synced_at = None
+
+    @property
+    def live_nodes(self) -> int:
+        self.refresh()
+        return self._live_nodes
+
+    def acquire(self) -> float:
+        """
+        Try to take a permit of this node's share
+        :return: Wait time (seconds), 0 when the permit is taken
+        """
+
+        self.refresh()
+        return self.limiter.acquire()
+
+    def refresh(self) -> None:
+        now = self.clock.monotonic()
+        if (
+            self._synced_at is not None
+            and now - self._synced_at < self.config.shard_sync_interval
+        ):
+            return
+        with self._lock:
+            if (
+                self._synced_at is not None
+                and now - self._synced_at < self.config.shard_sync_interval
+            ):
+                return
+            self._synced_at = now
+            try:
+                self.sync()
+            except Exception:
+                # keep the last share until the next sync
+                logger.exception(
+                    "[ClientThrottler] node shard sync failed, key: %s",
+                    self.config.shard_key,
+                )
+
+    def sync(self) -> None:
+        """
+        Send the heartbeat of this node and count live nodes
+        """
+
+        now = self.clock.time()
+        key = self.config.shard_key
+        with self.get_pipeline() as pipe:
+            pipe.zadd(key, {self.node_id: now})
+            pipe.zremrangebyscore(key, 0, now - self.config.node_timeout)
+            pipe.zcard(key)
+            pipe.expire(key, math.ceil(self.config.node_timeout))
+            live_nodes = max(1, pipe.execute()[2])
+        self._live_nodes = live_nodes
+        # keep whole permits and stretch the interval, so that the node admits exactly its share of the rate
+        share = self.config.max_requests / live_nodes
+        max_requests = max(1, math.floor(share))
+        self.limiter.interval = self.config.interval * max_requests / share
+        self.limiter.max_requests = max_requests
+
+    def reset(self) -> None:
+        with self._lock:
+            self._synced_at = None
+        self.limiter.reset()
+
+    def leave(self) -> None:
+        """
+        Remove the heartbeat of this node, so that other nodes take over its share at their next sync
+        """
+
+        self.config.redis_client.zrem(self.config.shard_key, self.node_id)
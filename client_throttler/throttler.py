@@ -23,16 +23,134 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import time
+import itertools
+import math
+import os
 import uuid
-from typing import Union
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
 
 from redis.client import Pipeline
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
 
+from client_throttler.adaptive import AdaptiveRate
+from client_throttler.breaker import CircuitBreaker
+from client_throttler.clock import LocalClock, RedisClock
+from client_throttler.coalescer import Coalescer
 from client_throttler.configs import ThrottlerConfig, default_config
-from client_throttler.constants import CACHE_KEY_TIMEOUT, TimeDurationUnit
-from client_throttler.exceptions import RetryTimeout, TooManyRequests, TooManyRetries
-from client_throttler.redis import MockPipeline
+from client_throttler.constants import (
+    CACHE_KEY_TIMEOUT,
+    Defaults,
+    FailurePolicy,
+    HookPoint,
+    TimeDurationUnit,
+)
+from client_throttler.exceptions import (
+    BackendUnavailable,
+    ConfigError,
+    ConnectionPoolTooSmall,
+    RetryTimeout,
+    TooManyRequests,
+    TooManyRetries,
+    UpstreamThrottled,
+)
+from client_throttler.hooks import bind_uninstrumented, instrument
+from client_throttler.local import LocalRateLimiter
+from client_throttler.quota import get_window, get_window_expiry, get_window_key
+from client_throttler.redis import MockPipeline, warmup_connections
+from client_throttler.sharding import NodeShard
+
+BACKEND_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError)
+
+# request tags only need to be unique, a random prefix per process and a counter are much cheaper than uuid1
+_tag_prefix = uuid.uuid4().hex
+_tag_counter = itertools.count()
+
+
+def _reset_tags() -> None:
+    global _tag_prefix, _tag_counter
+    _tag_prefix = uuid.uuid4().hex
+    _tag_counter = itertools.count()
+
+
+# fork is not available on every platform, eg: Windows
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_tags)
+
+
+def new_tag() -> str:
+    """
+    Unique request tag
+    """
+
+    return f"{_tag_prefix}-{next(_tag_counter)}"
+
+
+@dataclass
+class Admission:
+    """
+    Counts seen by a request after taking its placeholders
+
+    :param count: Requests within the interval, including this one
+    :param in_flight: Unexpired in-flight leases, including this one
+    :param paced: Requests within the pacing window, including this one
+    :param quota: Requests within the calendar window of the quota, including this one
+    """
+
+    count: int
+    in_flight: int = 0
+    paced: int = 0
+    quota: int = 0
+
+
+@dataclass
+class AcquireResult:
+    """
+    Outcome of trying to take a permit
+
+    :param allowed: Whether the permit is taken (or booked by reserve)
+    :param retry_after: Seconds until a permit frees up, or until the booked permit when reserved
+    :param remaining: Permits left in the current interval
+    :param tag: Request tag, pass it to Throttler.release once done with max_in_flight,
+        otherwise the in-flight lease is held until lease_timeout
+    :param paused: Whether rejected because upstream asked every node to pause
+    """
+
+    allowed: bool
+    retry_after: float = 0
+    remaining: int = 0
+    tag: str = ""
+    paused: bool = False
+
+
+@dataclass
+class LimiterStatus:
+    """
+    State of a limiter key, read without taking a permit
+
+    :param key: Key of the rate-limited method
+    :param count: Requests within the current interval
+    :param remaining: Permits left in the current interval
+    :param reset_after: Seconds until the oldest request leaves the interval and frees a permit, 0 when empty
+    :param queued: Permits booked by reserve and not yet due
+    :param admitting: Placeholders of requests being admitted
+    :param in_flight: Unexpired in-flight leases
+    :param quota_count: Requests within the calendar window of the quota
+    :param quota_remaining: Requests left in the calendar window of the quota
+    :param quota_reset_after: Seconds until the calendar window of the quota ends
+    """
+
+    key: str
+    count: int = 0
+    remaining: int = 0
+    reset_after: float = 0
+    queued: int = 0
+    admitting: int = 0
+    in_flight: int = 0
+    quota_count: int = 0
+    quota_remaining: int = 0
+    quota_reset_after: float = 0
 
 
 class Throttler:
@@ -41,11 +159,177 @@ class Throttler:
     calculate the waiting time for excessive requests, and continue the request after delaying through sleep.
 
     Previous request information used for throttling is stored in the cache.
+
+    Concurrency: a Throttler is immutable after construction. It works on a frozen copy of the config
+    and keeps per-call state in locals only, so one instance can be shared by any number of threads.
+    Set expected_concurrency to check that the redis connection pool can serve all of them.
     """
 
     def __init__(self, config: ThrottlerConfig = None):
-        self.config = config or default_config
-        self.config.mix_config()
+        self.config = (config or default_config).resolve()
+        self.check_key()
+        self.check_connection_pool()
+        self.check_failure_policy()
+        self.check_priority_shares()
+        self.check_sharding()
+        self.check_quota()
+        self.config.freeze()
+        # hooks cannot be added to a frozen config, the wrappers are only kept when needed
+        if not self.config.hooks:
+            bind_uninstrumented(self)
+        self.clock = self.build_clock()
+        self.breaker = self.build_breaker()
+        self.local_limiter = self.build_local_limiter()
+        self.adaptive = self.build_adaptive()
+        self.reserved_share = self.get_reserved_share()
+        self.coalescer = self.build_coalescer()
+        self.shard = self.build_shard()
+
+    def warmup(self) -> None:
+        """
+        Pay the one-off costs of the first call up front:
+        open expected_concurrency pooled connections, sync the server clock, the adaptive rate and the node shard
+        """
+
+        warmup_connections(
+            self.config.redis_client, self.config.expected_concurrency or 1
+        )
+        # the first uuid1 of metric tags looks up the node id
+        uuid.uuid1()
+        if isinstance(self.clock, RedisClock):
+            self.clock.sync()
+        if self.adaptive is not None:
+            self.adaptive.refresh()
+        if self.shard is not None:
+            self.shard.refresh()
+
+    def check_key(self) -> None:
+        # the key is derived from func when not given
+        if not self.config.key and not self.config.func:
+            raise ConfigError("key", self.config.key)
+
+    def check_failure_policy(self) -> None:
+        if self.config.failure_policy not in FailurePolicy.choices:
+            raise ConfigError("failure_policy", self.config.failure_policy)
+        if self.config.fallback_nodes < 1:
+            raise ConfigError("fallback_nodes", self.config.fallback_nodes)
+
+    def check_priority_shares(self) -> None:
+        shares = self.config.priority_shares
+        if any(not 0 <= share < 1 for share in shares.values()):
+            raise ConfigError("priority_shares", shares)
+        if sum(shares.values()) >= 1:
+            raise ConfigError("priority_shares", shares)
+
+    def get_reserved_share(self) -> float:
+        """
+        Share of the rate reserved for priority classes above this one
+        """
+
+        return sum(
+            share
+            for priority, share in self.config.priority_shares.items()
+            if priority > self.config.priority
+        )
+
+    def check_sharding(self) -> None:
+        if not self.config.enable_sharding:
+            return
+        # the share of each node is taken from the configured rate, without the features built on the request log
+        if (
+            self.config.max_in_flight
+            or self.config.priority_shares
+            or self.config.enable_adaptive_rate
+            or self.config.enable_pacing
+        ):
+            raise ConfigError("enable_sharding", self.config.enable_sharding)
+
+    def check_quota(self) -> None:
+        if not self.config.quota:
+            return
+        if self.config.enable_sharding:
+            raise ConfigError("quota", self.config.quota)
+        # without a rate, only the quota counter is kept, the features built on the request log are not available
+        if not self.config.rate and (
+            self.config.max_in_flight
+            or self.config.enable_pacing
+            or self.config.enable_coalescing
+            or self.config.enable_adaptive_rate
+            or self.config.failure_policy == FailurePolicy.LOCAL
+        ):
+            raise ConfigError("rate", self.config.rate)
+
+    def build_shard(self) -> Optional[NodeShard]:
+        if not self.config.enable_sharding:
+            return None
+        return NodeShard(self.config, self.clock, self._get_pipline)
+
+    def build_coalescer(self) -> Optional[Coalescer]:
+        if not self.config.enable_coalescing:
+            return None
+        return Coalescer(
+            self, self.config.coalesce_max_batch, self.config.coalesce_max_delay
+        )
+
+    def build_breaker(self) -> Optional[CircuitBreaker]:
+        if not self.config.circuit_breaker_threshold:
+            return None
+        return CircuitBreaker(
+            self.config.circuit_breaker_threshold,
+            self.config.circuit_breaker_cooldown,
+            self.clock.monotonic,
+        )
+
+    def build_local_limiter(self) -> Optional[LocalRateLimiter]:
+        if self.config.failure_policy != FailurePolicy.LOCAL:
+            return None
+        return LocalRateLimiter(
+            max(1, self.config.max_requests // self.config.fallback_nodes),
+            self.config.interval,
+            self.clock.monotonic,
+        )
+
+    def build_adaptive(self) -> Optional[AdaptiveRate]:
+        if not self.config.enable_adaptive_rate:
+            return None
+        return AdaptiveRate(self.config, self.clock, self._get_pipline)
+
+    @property
+    def max_requests(self) -> int:
+        """
+        Max requests in the interval, lowered by throttle signals when adaptive rate is enabled,
+        and by the shares reserved for higher priority classes
+        """
+
+        max_requests = (
+            self.config.max_requests
+            if self.adaptive is None
+            else self.adaptive.max_requests
+        )
+        if self.reserved_share:
+            return max(1, math.floor(max_requests * (1 - self.reserved_share)))
+        return max_requests
+
+    def build_clock(self) -> LocalClock:
+        if self.config.clock:
+            return self.config.clock
+        if self.config.enable_server_time:
+            return RedisClock(self.config.redis_client, self.config.clock_sync_interval)
+        return LocalClock()
+
+    def check_connection_pool(self) -> None:
+        """
+        Make sure the redis connection pool can serve expected_concurrency threads at once
+        """
+
+        if not self.config.expected_concurrency:
+            return
+        pool = getattr(self.config.redis_client, "connection_pool", None)
+        max_connections = getattr(pool, "max_connections", None)
+        if max_connections and max_connections < self.config.expected_concurrency:
+            raise ConnectionPoolTooSmall(
+                max_connections, self.config.expected_concurrency
+            )
 
     def get_request_count(self, start_time: float, tag: str, now: float) -> int:
         """
@@ -55,51 +339,364 @@ class Throttler:
         :param now: Current time
         """
 
+        return self.get_admission(start_time, tag, now).count
+
+    @instrument(HookPoint.GET_REQUEST_COUNT)
+    def get_admission(self, start_time: float, tag: str, now: float) -> Admission:
+        """
+        Take a placeholder in every limit and count them in one round trip
+        :param start_time: Start time
+        :param tag: Request tag
+        :param now: Current time
+        """
+
+        if self.coalescer is not None:
+            return self.coalescer.get_admission(start_time, tag, now)
+        with self._get_pipline() as pipe:
+            self.queue_admission(pipe, start_time, tag, now)
+            return self.parse_admission(pipe.execute())
+
+    def queue_admission(
+        self,
+        pipe: Union[Pipeline, MockPipeline],
+        start_time: float,
+        tag: str,
+        now: float,
+    ) -> int:
+        """
+        Queue the admission commands of a request, so that many requests can share a round trip
+        :param pipe: Pipeline
+        :param start_time: Start time
+        :param tag: Request tag
+        :param now: Current time
+        :return: Number of queued commands, their results are parsed by parse_admission
+        """
+
         """
         1. Delete data outside the interval
         2. Insert the current record (maximum value is used to prevent the record from being deleted)
         3. Get the number of requests within the current interval to determine if the frequency is exceeded
         4. Set the expiration time for the large key to prevent cold data from occupying space
+        With max_in_flight, the same steps run on the lease set, where leases are scored by their expiry
+        With pacing, the requests within the pacing window (placeholders included) are counted as well
+        With a quota, the counter of the current calendar window is incremented
+        Stale placeholders and requests beyond the size cap are compacted before counting
         """
 
-        with self._get_pipline() as pipe:
+        pipe.zremrangebyscore(
+            self.config.cache_key,
+            0,
+            start_time - TimeDurationUnit.MILLISECOND.value,
+        )
+        compaction = self.queue_compaction(pipe, now)
+        pipe.zadd(
+            self.config.cache_key,
+            {tag: now + self.config.placeholder_offset},
+        )
+        pipe.zcard(self.config.cache_key)
+        pipe.expire(self.config.cache_key, CACHE_KEY_TIMEOUT)
+        queued = 4 + compaction
+        if self.config.max_in_flight:
+            pipe.zremrangebyscore(self.config.in_flight_key, 0, now)
+            pipe.zadd(self.config.in_flight_key, {tag: now + self.config.lease_timeout})
+            pipe.zcard(self.config.in_flight_key)
+            pipe.expire(self.config.in_flight_key, self.lease_key_timeout)
+            queued += 4
+        if self.config.quota:
+            queued += self.queue_quota(pipe, now)
+        if self.config.enable_pacing:
+            pipe.zcount(
+                self.config.cache_key,
+                f"({now - self.config.pacing_interval}",
+                "+inf",
+            )
+            queued += 1
+        return queued
+
+    def parse_admission(self, results: list) -> Admission:
+        """
+        Build the admission from the results of the commands queued by queue_admission
+        """
+
+        compaction = len(results) - 4
+        if self.config.max_in_flight:
+            compaction -= 4
+        if self.config.enable_pacing:
+            compaction -= 1
+        if self.config.quota:
+            compaction -= 2
+        admission = Admission(count=results[2 + compaction])
+        if self.config.max_in_flight:
+            admission.in_flight = results[6 + compaction]
+        if self.config.quota:
+            admission.quota = results[-3 if self.config.enable_pacing else -2]
+        if self.config.enable_pacing:
+            admission.paced = results[-1]
+        return admission
+
+    def get_quota_window(self, now: float) -> Tuple[str, float]:
+        """
+        Get the counter key and the end timestamp of the calendar window containing now
+        """
+
+        start, end = get_window(self.config.quota_unit, now, self.config.quota_timezone)
+        return get_window_key(self.config.quota_key, start), end
+
+    def queue_quota(self, pipe: Union[Pipeline, MockPipeline], now: float) -> int:
+        """
+        Queue the increment of the counter of the current calendar window,
+        the counter expires after the window ends
+        :param pipe: Pipeline
+        :param now: Current time
+        :return: Number of queued commands, the first result is the count including this request
+        """
+
+        key, end = self.get_quota_window(now)
+        pipe.incr(key)
+        pipe.expireat(key, get_window_expiry(end))
+        return 2
+
+    def queue_compaction(self, pipe: Union[Pipeline, MockPipeline], now: float) -> int:
+        """
+        Queue the removal of placeholders older than placeholder_timeout, left by crashed callers
+        :param pipe: Pipeline
+        :param now: Current time
+        :return: Number of queued commands
+        """
+
+        queued = 0
+        if self.config.placeholder_timeout:
+            # placeholders are scored at admission time + placeholder_offset,
+            # bookings stay below now + placeholder_offset / 2
             pipe.zremrangebyscore(
                 self.config.cache_key,
-                0,
-                start_time - TimeDurationUnit.MILLISECOND.value,
+                now + self.config.placeholder_offset / 2,
+                now + self.config.placeholder_offset - self.config.placeholder_timeout,
             )
-            pipe.zadd(
+            queued += 1
+        return queued
+
+    def is_oversized(self, admission: Admission) -> bool:
+        """
+        Whether the request log may hold more than max_requests + compaction_margin requests,
+        placeholders and bookings are counted so that the check needs no extra command
+        """
+
+        return bool(self.config.compaction_margin) and (
+            admission.count > self.config.max_requests + self.config.compaction_margin
+        )
+
+    def trim(self, now: float) -> int:
+        """
+        Remove the oldest requests beyond max_requests + compaction_margin,
+        placeholders and bookings are scored after now and never removed
+        :param now: Current time
+        :return: Number of removed entries
+        """
+
+        entries = self.config.redis_client.zrevrangebyscore(
+            self.config.cache_key,
+            now,
+            "-inf",
+            start=self.config.max_requests + self.config.compaction_margin,
+            num=1,
+            withscores=True,
+        )
+        if not entries:
+            return 0
+        return self.config.redis_client.zremrangebyscore(
+            self.config.cache_key, "-inf", entries[0][1]
+        )
+
+    def compact(self) -> int:
+        """
+        Remove requests outside the interval, stale placeholders and requests beyond the size cap
+        :return: Number of removed entries
+        """
+
+        now = self.clock.time()
+        with self._get_pipline() as pipe:
+            pipe.zremrangebyscore(
                 self.config.cache_key,
-                {tag: now + self.config.placeholder_offset},
+                0,
+                now - self.config.interval - TimeDurationUnit.MILLISECOND.value,
             )
-            pipe.zcard(self.config.cache_key)
-            pipe.expire(self.config.cache_key, CACHE_KEY_TIMEOUT)
-            _, _, count, _ = pipe.execute()
-        return count
+            self.queue_compaction(pipe, now)
+            removed = sum(pipe.execute())
+        if self.config.compaction_margin:
+            removed += self.trim(now)
+        return removed
 
-    def get_wait_time(self, start_time: float, now: float, tag: str) -> float:
+    def is_admitted(self, admission: Admission) -> bool:
+        if admission.count > self.max_requests:
+            return False
+        if (
+            self.config.max_in_flight
+            and admission.in_flight > self.config.max_in_flight
+        ):
+            return False
+        if self.config.enable_pacing and admission.paced > self.config.pacing_burst:
+            return False
+        if self.config.quota and admission.quota > self.config.quota_max_requests:
+            return False
+        return True
+
+    def get_wait_time(
+        self, start_time: float, now: float, tag: str, admission: Admission = None
+    ) -> float:
         """
-        Get the wait time
+        Get the wait time before trying again, half of the retry-after to race for freed permits
         :param start_time: Start time
         :param now: Current time
         :param tag: Request tag
+        :param admission: Rejected admission, the rate limit is assumed to be exceeded if not set
         :return: Wait time (seconds)
         """
 
+        return self.to_wait_time(self.get_retry_after(start_time, now, tag, admission))
+
+    def to_wait_time(self, retry_after: float) -> float:
+        if self.config.enable_pacing:
+            return retry_after / 2 or self.config.pacing_interval / 2
+        return retry_after / 2 or self.config.interval / 2
+
+    @instrument(HookPoint.GET_WAIT_TIME)
+    def get_retry_after(
+        self, start_time: float, now: float, tag: str, admission: Admission = None
+    ) -> float:
+        """
+        Remove the placeholders of a rejected request and get the time until a permit frees up
+        :param start_time: Start time
+        :param now: Current time
+        :param tag: Request tag
+        :param admission: Rejected admission, the rate limit is assumed to be exceeded if not set
+        :return: Retry after (seconds)
+        """
+
+        with self._get_pipline() as pipe:
+            self.queue_retry_after(pipe, start_time, now, tag)
+            return self.parse_retry_after(pipe.execute(), now, admission)
+
+    def queue_retry_after(
+        self,
+        pipe: Union[Pipeline, MockPipeline],
+        start_time: float,
+        now: float,
+        tag: str,
+    ) -> int:
+        """
+        Queue the commands removing the placeholders of a rejected request and looking up the oldest entries
+        :return: Number of queued commands, their results are parsed by parse_retry_after
+        """
+
         # If rate-limited, remove the inserted record and calculate the next request time
         # based on the time of the first request in the current interval.
+        # If in-flight limited, release the lease and wait for the first lease to expire or poll.
+        # If paced, wait for the first request in the pacing window to leave it.
+        # With a quota, give the count back and wait for the calendar window to end when it is used up.
 
-        with self._get_pipline() as pipe:
-            pipe.zrem(self.config.cache_key, tag)
+        pipe.zrem(self.config.cache_key, tag)
+        pipe.zrangebyscore(
+            self.config.cache_key, start_time, now, start=0, num=1, withscores=True
+        )
+        queued = 2
+        if self.config.enable_pacing:
             pipe.zrangebyscore(
-                self.config.cache_key, start_time, now, start=0, num=1, withscores=True
+                self.config.cache_key,
+                f"({now - self.config.pacing_interval}",
+                now,
+                start=0,
+                num=1,
+                withscores=True,
+            )
+            queued += 1
+        if self.config.quota:
+            pipe.decr(self.get_quota_window(now)[0])
+            queued += 1
+        if self.config.max_in_flight:
+            pipe.zrem(self.config.in_flight_key, tag)
+            pipe.zrangebyscore(
+                self.config.in_flight_key,
+                now,
+                "+inf",
+                start=0,
+                num=1,
+                withscores=True,
+            )
+            queued += 2
+        return queued
+
+    def parse_retry_after(
+        self, results: list, now: float, admission: Admission = None
+    ) -> float:
+        """
+        Get the retry-after from the results of the commands queued by queue_retry_after
+        """
+
+        retry_after = 0
+        if admission is None or admission.count > self.max_requests:
+            retry_after = self.calculate_rate_retry_after(results[1], now)
+        if self.config.enable_pacing and (
+            admission is None or admission.paced > self.config.pacing_burst
+        ):
+            retry_after = max(
+                retry_after, self.calculate_pacing_retry_after(results[2], now)
             )
-            _, result = pipe.execute()
+        if self.config.max_in_flight and (
+            admission is None or admission.in_flight > self.config.max_in_flight
+        ):
+            retry_after = max(
+                retry_after, self.calculate_lease_retry_after(results[-1], now)
+            )
+        if self.config.quota and (
+            admission is None or admission.quota > self.config.quota_max_requests
+        ):
+            retry_after = max(retry_after, self.get_quota_window(now)[1] - now)
+        return retry_after
+
+    def calculate_rate_retry_after(self, result: list, now: float) -> float:
+        if not result:
+            return self.config.interval
+        _, last_time = result[0]
+        return max(0, last_time + self.config.interval - now)
+
+    def calculate_pacing_retry_after(self, result: list, now: float) -> float:
         if not result:
-            return self.config.interval / 2
+            return self.config.pacing_interval
         _, last_time = result[0]
-        return (last_time + self.config.interval - now) / 2 or self.config.interval / 2
+        return max(0, last_time + self.config.pacing_interval - now)
+
+    def calculate_lease_retry_after(self, result: list, now: float) -> float:
+        if not result:
+            return self.config.in_flight_poll_interval
+        _, expire_time = result[0]
+        return max(0, min(expire_time - now, self.config.in_flight_poll_interval))
+
+    @property
+    def lease_key_timeout(self) -> float:
+        return max(CACHE_KEY_TIMEOUT.seconds, math.ceil(self.config.lease_timeout))
 
+    def release(self, tag: str) -> None:
+        """
+        Release the in-flight lease of a request
+        :param tag: Request tag
+        """
+
+        if not self.config.max_in_flight:
+            return
+        # the lease expires after lease_timeout, no need to wait for redis while it is down
+        if self.breaker is not None and not self.breaker.allow():
+            return
+        try:
+            self.config.redis_client.zrem(self.config.in_flight_key, tag)
+        except BACKEND_ERRORS:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            return
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    @instrument(HookPoint.UPDATE_TIME)
     def update_time(self, tag: str) -> None:
         """
         Update this request's time
@@ -109,7 +706,7 @@ class Throttler:
         # If there is not be limited, update the record to the current timestamp plus buffer time
         # (buffer time is used to simulate the interval between unlocking and the request)
 
-        self.config.redis_client.zadd(self.config.cache_key, {tag: time.time()})
+        self.config.redis_client.zadd(self.config.cache_key, {tag: self.clock.time()})
 
     def try_limit(self, tag: str) -> float:
         """
@@ -118,15 +715,208 @@ class Throttler:
         :return: Wait time (seconds)
         """
 
-        now = time.time()
-        start_time = now - self.config.interval
-        count = self.get_request_count(start_time, tag, now)
-        if count > self.config.max_requests:
-            return self.get_wait_time(start_time, now, tag)
-        else:
-            self.record_metric(count)
-            self.update_time(tag)
+        result = self.acquire(tag)
+        if result.allowed:
+            return 0
+        # upstream asked every node to pause, there is no permit to race for until the pause ends
+        if result.paused:
+            return result.retry_after
+        return self.to_wait_time(result.retry_after)
+
+    def try_acquire(self) -> AcquireResult:
+        """
+        Try to take a permit without blocking, the permit is used when allowed.
+        With max_in_flight, an allowed permit holds a lease until release(result.tag) or lease_timeout.
+        """
+
+        return self.acquire(new_tag())
+
+    def acquire(self, tag: str) -> AcquireResult:
+        """
+        Try to take a permit, the failure policy decides when redis fails or the circuit breaker is open
+        :param tag: Request tag
+        """
+
+        if self.shard is not None:
+            wait_time = self.shard.acquire()
+            return AcquireResult(allowed=not wait_time, retry_after=wait_time, tag=tag)
+        if self.breaker is not None and not self.breaker.allow():
+            return self.degrade(tag)
+        try:
+            result = self.acquire_with_redis(tag)
+        except BACKEND_ERRORS as err:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            return self.degrade(tag, err)
+        if self.breaker is not None:
+            self.breaker.record_success()
+        return result
+
+    def get_pause(self, now: float) -> float:
+        """
+        Seconds left of the pause requested by upstream, 0 when not paused
+        """
+
+        if self.adaptive is None:
             return 0
+        return max(0, self.adaptive.paused_until - now)
+
+    def acquire_with_redis(self, tag: str) -> AcquireResult:
+        """
+        Try to take a permit with the requests recorded in redis
+        :param tag: Request tag
+        """
+
+        now = self.clock.time()
+        pause = self.get_pause(now)
+        if pause:
+            return AcquireResult(allowed=False, retry_after=pause, tag=tag, paused=True)
+        if not self.config.rate:
+            return self.acquire_quota(tag, now)
+        start_time = now - self.config.interval
+        admission = self.get_admission(start_time, tag, now)
+        if self.is_oversized(admission):
+            self.trim(now)
+        max_requests = self.max_requests
+        if not self.is_admitted(admission):
+            retry_after = self.get_retry_after(start_time, now, tag, admission)
+            return AcquireResult(allowed=False, retry_after=retry_after, tag=tag)
+        self.record_metric(admission.count)
+        self.update_time(tag)
+        remaining = max_requests - admission.count
+        if self.config.quota:
+            remaining = min(remaining, self.config.quota_max_requests - admission.quota)
+        return AcquireResult(allowed=True, remaining=max(0, remaining), tag=tag)
+
+    def acquire_quota(self, tag: str, now: float) -> AcquireResult:
+        """
+        Try to take a permit with the counter of the calendar window only, when no rate is set
+        :param tag: Request tag
+        :param now: Current time
+        """
+
+        with self._get_pipline() as pipe:
+            self.queue_quota(pipe, now)
+            count, _ = pipe.execute()
+        key, end = self.get_quota_window(now)
+        if count > self.config.quota_max_requests:
+            self.config.redis_client.decr(key)
+            return AcquireResult(allowed=False, retry_after=end - now, tag=tag)
+        self.record_metric(count)
+        return AcquireResult(
+            allowed=True, remaining=self.config.quota_max_requests - count, tag=tag
+        )
+
+    def reserve(self, max_wait: float = None) -> AcquireResult:
+        """
+        Book the next permit without blocking, permits are booked in FIFO order.
+        The caller should run after retry_after seconds, the booking is dropped when it would exceed max_wait.
+        In-flight leases are not taken by reservations, and nothing is booked with max_in_flight or a quota.
+        :param max_wait: Max seconds until the booked permit
+        """
+
+        tag = new_tag()
+        if self.config.max_in_flight or self.config.quota or self.shard is not None:
+            return self.acquire(tag)
+        if self.breaker is not None and not self.breaker.allow():
+            return self.degrade(tag)
+        try:
+            result = self.acquire_with_redis(tag)
+            # only book after a rate rejection, not while upstream asked to pause
+            if not result.allowed and not result.paused:
+                result = self.book(tag, max_wait)
+        except BACKEND_ERRORS as err:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            return self.degrade(tag, err)
+        if self.breaker is not None:
+            self.breaker.record_success()
+        return result
+
+    def book(self, tag: str, max_wait: float = None) -> AcquireResult:
+        """
+        Book the earliest permit after every existing request,
+        then check the window optimistically and try again on conflicts
+        :param tag: Request tag
+        :param max_wait: Max seconds until the booked permit
+        """
+
+        max_requests = self.max_requests
+        for _ in range(max(1, self.config.max_retry_times or Defaults.max_book_times)):
+            now = self.clock.time()
+            # placeholders of requests being admitted are scored far in the future
+            horizon = now + self.config.placeholder_offset / 2
+            entries = self.config.redis_client.zrevrangebyscore(
+                self.config.cache_key,
+                f"({horizon}",
+                now - self.config.interval,
+                start=0,
+                num=max_requests,
+                withscores=True,
+            )
+            booked_time = now
+            if len(entries) >= max_requests:
+                booked_time = max(
+                    now, entries[0][1], entries[-1][1] + self.config.interval
+                )
+            if self.config.enable_pacing and len(entries) >= self.config.pacing_burst:
+                booked_time = max(
+                    booked_time,
+                    entries[0][1],
+                    entries[self.config.pacing_burst - 1][1]
+                    + self.config.pacing_interval,
+                )
+            retry_after = booked_time - now
+            if booked_time >= horizon or (
+                max_wait is not None and retry_after > max_wait
+            ):
+                return AcquireResult(allowed=False, retry_after=retry_after, tag=tag)
+            with self._get_pipline() as pipe:
+                pipe.zadd(self.config.cache_key, {tag: booked_time})
+                pipe.zcount(
+                    self.config.cache_key,
+                    f"({booked_time - self.config.interval}",
+                    booked_time,
+                )
+                pipe.expire(self.config.cache_key, self.book_key_timeout(retry_after))
+                if self.config.enable_pacing:
+                    pipe.zcount(
+                        self.config.cache_key,
+                        f"({booked_time - self.config.pacing_interval}",
+                        booked_time,
+                    )
+                _, count, _, *paced = pipe.execute()
+            if count <= max_requests and (
+                not paced or paced[0] <= self.config.pacing_burst
+            ):
+                self.record_metric(count)
+                return AcquireResult(allowed=True, retry_after=retry_after, tag=tag)
+            self.config.redis_client.zrem(self.config.cache_key, tag)
+        return AcquireResult(allowed=False, retry_after=retry_after, tag=tag)
+
+    def book_key_timeout(self, retry_after: float) -> int:
+        return max(
+            CACHE_KEY_TIMEOUT.seconds,
+            math.ceil(retry_after + self.config.interval),
+        )
+
+    @instrument(HookPoint.DEGRADE)
+    def degrade(self, tag: str, error: Exception = None) -> AcquireResult:
+        """
+        Admit the request according to the failure policy
+        :param tag: Request tag
+        :param error: Redis error, None when redis is skipped by the circuit breaker
+        """
+
+        policy = self.config.failure_policy
+        if policy == FailurePolicy.OPEN:
+            return AcquireResult(allowed=True, tag=tag)
+        if policy == FailurePolicy.LOCAL:
+            wait_time = self.local_limiter.acquire()
+            return AcquireResult(allowed=not wait_time, retry_after=wait_time, tag=tag)
+        if policy == FailurePolicy.RAISE and error is not None:
+            raise error
+        raise BackendUnavailable(self.config.cache_key) from error
 
     def check_retry_times(self, tag: str, retry_times: int) -> None:
         if self.config.max_retry_times and retry_times > self.config.max_retry_times:
@@ -137,9 +927,14 @@ class Throttler:
     ) -> None:
         if self.config.max_retry_duration:
             expect_time = start_time + self.config.max_retry_duration
-            actual_time = time.time() + wait_time
+            actual_time = self.clock.monotonic() + wait_time
             if actual_time > expect_time:
-                raise RetryTimeout(tag, expect_time, actual_time)
+                # compared on the monotonic clock, reported as timestamps
+                raise RetryTimeout(
+                    tag,
+                    self.clock.to_epoch(expect_time),
+                    self.clock.to_epoch(actual_time),
+                )
 
     def wait(self, tag: str) -> None:
         """
@@ -149,7 +944,7 @@ class Throttler:
         """
 
         retry_times = 0
-        start_time = time.time()
+        start_time = self.clock.monotonic()
         while True:
             wait_time = self.try_limit(tag)
             if not wait_time:
@@ -158,17 +953,129 @@ class Throttler:
             self.check_retry_times(tag, retry_times)
             self.check_retry_duration(tag, start_time, wait_time)
             if self.config.enable_sleep_wait:
-                time.sleep(wait_time)
+                self.sleep(wait_time)
                 continue
             raise TooManyRequests()
 
+    @instrument(HookPoint.SLEEP)
+    def sleep(self, wait_time: float) -> None:
+        """
+        Sleep before retry
+        :param wait_time: Wait time (seconds)
+        """
+
+        self.clock.sleep(wait_time)
+
+    def status(self) -> LimiterStatus:
+        """
+        Read the state of the key of this throttler in one round trip, without taking a permit
+        """
+
+        return self.inspect([self.config.redis_key])[0]
+
+    def inspect(self, keys: Sequence[str]) -> List[LimiterStatus]:
+        """
+        Read the state of many keys sharing the config of this throttler in one round trip, without taking permits
+        :param keys: Keys of rate-limited methods, as set in the key config
+        """
+
+        now = self.clock.time()
+        configs = [self.config.copy(key=key) for key in keys]
+        with self._get_pipline() as pipe:
+            sizes = [self.queue_status(pipe, config, now) for config in configs]
+            outputs = pipe.execute()
+        statuses, offset = [], 0
+        for key, size in zip(keys, sizes):
+            statuses.append(
+                self.parse_status(key, outputs[offset : offset + size], now)
+            )
+            offset += size
+        return statuses
+
+    def queue_status(
+        self,
+        pipe: Union[Pipeline, MockPipeline],
+        config: ThrottlerConfig,
+        now: float,
+    ) -> int:
+        """
+        Queue the read-only commands counting the requests of a key
+        :param pipe: Pipeline
+        :param config: Config of the key, built from the config of this throttler
+        :param now: Current time
+        :return: Number of queued commands, their results are parsed by parse_status
+        """
+
+        queued = 0
+        if self.config.rate:
+            # bookings stay below now + placeholder_offset / 2, placeholders are above
+            horizon = now + self.config.placeholder_offset / 2
+            pipe.zcount(config.cache_key, now - self.config.interval, now)
+            pipe.zrangebyscore(
+                config.cache_key,
+                now - self.config.interval,
+                now,
+                start=0,
+                num=1,
+                withscores=True,
+            )
+            pipe.zcount(config.cache_key, f"({now}", f"({horizon}")
+            pipe.zcount(config.cache_key, horizon, "+inf")
+            queued += 4
+        if self.config.max_in_flight:
+            pipe.zcount(config.in_flight_key, f"({now}", "+inf")
+            queued += 1
+        if self.config.quota:
+            start, _ = get_window(
+                self.config.quota_unit, now, self.config.quota_timezone
+            )
+            pipe.get(get_window_key(config.quota_key, start))
+            queued += 1
+        return queued
+
+    def parse_status(self, key: str, results: list, now: float) -> LimiterStatus:
+        """
+        Build the status of a key from the results of the commands queued by queue_status
+        """
+
+        status = LimiterStatus(key=key)
+        if self.config.rate:
+            status.count, oldest, status.queued, status.admitting = results[:4]
+            status.remaining = max(0, self.max_requests - status.count)
+            if oldest:
+                status.reset_after = self.calculate_rate_retry_after(oldest, now)
+        if self.config.max_in_flight:
+            status.in_flight = results[4 if self.config.rate else 0]
+        if self.config.quota:
+            status.quota_count = int(results[-1] or 0)
+            status.quota_remaining = max(
+                0, self.config.quota_max_requests - status.quota_count
+            )
+            status.quota_reset_after = self.get_quota_window(now)[1] - now
+        return status
+
     def reset(self) -> None:
         """
         Clean up the keys stored in Redis.
         """
 
-        self.config.redis_client.delete(self.config.cache_key)
+        keys = [self.config.cache_key]
+        if self.config.max_in_flight:
+            keys.append(self.config.in_flight_key)
+        if self.config.quota:
+            keys.append(self.get_quota_window(self.clock.time())[0])
+        if self.adaptive is not None:
+            keys.append(self.config.adaptive_key)
+        if self.shard is not None:
+            keys.append(self.config.shard_key)
+        self.config.redis_client.delete(*keys)
+        # load the cleared state at the next call
+        if self.adaptive is not None:
+            self.adaptive.reset()
+        if self.shard is not None:
+            self.shard.reset()
 
+    @instrument(HookPoint.RECORD_METRIC)
     def record_metric(self, count: int) -> None:
         """
         Record metric
@@ -177,14 +1084,14 @@ class Throttler:
         if not self.config.enable_metric_record:
             return
 
-        now = time.time()
+        now = self.clock.time()
         with self._get_pipline() as pipe:
             pipe.zremrangebyscore(
                 self.config.metric_key,
                 0,
                 now - CACHE_KEY_TIMEOUT.seconds,
             )
-            pipe.zadd(self.config.metric_key, {f"{count}:{uuid.uuid1()}": time.time()})
+            pipe.zadd(self.config.metric_key, {f"{count}:{uuid.uuid1()}": now})
             pipe.expire(self.config.metric_key, CACHE_KEY_TIMEOUT)
             pipe.execute()
 
@@ -193,7 +1100,62 @@ class Throttler:
             return self.config.redis_client.pipeline(transaction=False)
         return MockPipeline(self.config.redis_client)
 
+    def report_success(self) -> None:
+        """
+        Report that upstream served a request, raises the adaptive rate
+        """
+
+        if self.adaptive is not None:
+            self.adaptive.on_success()
+
+    def report_throttled(self, retry_after: float = None) -> None:
+        """
+        Report that upstream throttled a request, lowers the adaptive rate on every node
+        :param retry_after: Seconds every node should wait before the next request
+        """
+
+        if self.adaptive is None:
+            return
+        # while redis is skipped, the rate is only lowered on this node
+        if self.breaker is not None and not self.breaker.allow():
+            self.adaptive.on_throttled(retry_after, share=False)
+            return
+        try:
+            self.adaptive.on_throttled(retry_after)
+        except BACKEND_ERRORS:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            return
+        if self.breaker is not None:
+            self.breaker.record_success()
+
     def __call__(self, *args, **kwargs) -> any:
-        tag = str(uuid.uuid1())
+        tag = new_tag()
         self.wait(tag)
-        return self.config.func(*args, **kwargs)
+        if self.config.max_in_flight:
+            try:
+                return self.call(*args, **kwargs)
+            finally:
+                self.release(tag)
+        return self.call(*args, **kwargs)
+
+    def call(self, *args, **kwargs) -> any:
+        """
+        Call func and report the outcome to the adaptive rate
+        """
+
+        if self.adaptive is None:
+            return self.config.func(*args, **kwargs)
+        try:
+            result = self.config.func(*args, **kwargs)
+        except UpstreamThrottled as err:
+            self.report_throttled(err.retry_after)
+            raise
+        signal = None
+        if self.config.adaptive_feedback:
+            signal = self.config.adaptive_feedback(result)
+        if signal is None or signal is False:
+            self.report_success()
+        else:
+            self.report_throttled(None if signal is True else signal)
+        return result
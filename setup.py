@@ -52,5 +52,6 @@ setup(
     ],
     python_requires=">=3.6, <4",
     install_requires=requires,
+    entry_points={"console_scripts": ["client-throttler=client_throttler.cli:main"]},
     license="MIT",
 )
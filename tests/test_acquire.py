@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.constants import FailurePolicy
+from tests.mock.api import request_api
+from tests.mock.redis import fake_redis_client
+
+
+class AcquireTest(unittest.TestCase):
+    def setUp(self):
+        self.client = InMemoryRedisClient()
+        self.throttler = Throttler(
+            ThrottlerConfig(func=request_api, rate="2/s", redis_client=self.client)
+        )
+
+    def test_try_acquire(self):
+        result = self.throttler.try_acquire()
+        self.assertTrue(result.allowed)
+        self.assertEqual(1, result.remaining)
+        self.assertEqual(0, result.retry_after)
+        self.assertEqual(0, self.throttler.try_acquire().remaining)
+
+        result = self.throttler.try_acquire()
+        self.assertFalse(result.allowed)
+        self.assertEqual(0, result.remaining)
+        self.assertGreater(result.retry_after, 0.9)
+        self.assertLessEqual(result.retry_after, 1)
+        # the rejected placeholder is removed
+        self.assertEqual(2, self.client.zcard(self.throttler.config.cache_key))
+
+    def test_reserve(self):
+        self.assertEqual(0, self.throttler.reserve().retry_after)
+        self.throttler.try_acquire()
+        retry_after = [self.throttler.reserve().retry_after for _ in range(3)]
+        self.assertAlmostEqual(1, retry_after[0], delta=0.1)
+        self.assertAlmostEqual(1, retry_after[1], delta=0.1)
+        self.assertAlmostEqual(2, retry_after[2], delta=0.1)
+        self.assertFalse(self.throttler.try_acquire().allowed)
+
+    def test_reserve_max_wait(self):
+        for _ in range(2):
+            self.throttler.try_acquire()
+        result = self.throttler.reserve(max_wait=0.5)
+        self.assertFalse(result.allowed)
+        self.assertAlmostEqual(1, result.retry_after, delta=0.1)
+        self.assertEqual(2, self.client.zcard(self.throttler.config.cache_key))
+
+    def test_failure_policy(self):
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="2/s",
+                redis_client=fake_redis_client,
+                failure_policy=FailurePolicy.LOCAL,
+            )
+        )
+        self.assertTrue(throttler.try_acquire().allowed)
+        self.assertTrue(throttler.reserve().allowed)
+        result = throttler.reserve()
+        self.assertFalse(result.allowed)
+        self.assertGreater(result.retry_after, 0)
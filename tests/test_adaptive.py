@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.clock import SimulatedClock
+from client_throttler.exceptions import UpstreamThrottled
+from tests.mock.api import request_api
+
+
+def throttled_api(status: int) -> int:
+    if status == 429:
+        raise UpstreamThrottled(retry_after=None)
+    return status
+
+
+class AdaptiveRateTest(unittest.TestCase):
+    def setUp(self):
+        self.client = InMemoryRedisClient()
+
+    def build_config(self, **kwargs) -> ThrottlerConfig:
+        params = dict(
+            func=throttled_api,
+            rate="8/s",
+            redis_client=self.client,
+            enable_adaptive_rate=True,
+            adaptive_sync_interval=0,
+        )
+        params.update(kwargs)
+        return ThrottlerConfig(**params)
+
+    def test_disabled(self):
+        throttler = Throttler(
+            ThrottlerConfig(func=request_api, rate="8/s", redis_client=self.client)
+        )
+        self.assertIsNone(throttler.adaptive)
+        self.assertEqual(8, throttler.max_requests)
+        throttler.report_throttled(1)
+        throttler.report_success()
+
+    def test_decrease(self):
+        clock = SimulatedClock(start=1_000_000)
+        throttler = Throttler(self.build_config(clock=clock))
+        self.assertEqual(8, throttler.max_requests)
+        with self.assertRaises(UpstreamThrottled):
+            throttler(429)
+        self.assertEqual(4, throttler.max_requests)
+        # shared by every node
+        self.assertEqual(4, Throttler(self.build_config()).max_requests)
+        for _ in range(5):
+            clock.sleep(1)
+            throttler.report_throttled()
+        self.assertEqual(1, throttler.max_requests)
+
+    def test_concurrent_reports(self):
+        clock = SimulatedClock(start=1_000_000)
+        throttler = Throttler(self.build_config(rate="100/s", clock=clock))
+        # requests in flight are throttled together, the rate is decreased once per interval
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: throttler.report_throttled(), range(8)))
+        self.assertEqual(50, throttler.max_requests)
+        clock.sleep(0.5)
+        throttler.report_throttled(retry_after=2)
+        self.assertEqual(50, throttler.max_requests)
+        self.assertFalse(throttler.try_acquire().allowed)
+        clock.sleep(2)
+        throttler.report_throttled()
+        self.assertEqual(25, throttler.max_requests)
+
+    def test_increase(self):
+        throttler = Throttler(self.build_config())
+        throttler.report_throttled()
+        self.assertEqual(4, throttler.max_requests)
+        # about adaptive_increase per window of successes
+        for _ in range(6):
+            throttler.report_success()
+            _ = throttler.max_requests
+        self.assertEqual(5, throttler.max_requests)
+        for _ in range(100):
+            throttler.report_success()
+        self.assertEqual(8, throttler.max_requests)
+
+    def test_retry_after(self):
+        throttler = Throttler(self.build_config(func=request_api))
+        throttler.report_throttled(retry_after=10)
+        self.assertAlmostEqual(10, throttler.try_limit("tag"), delta=1)
+        self.assertAlmostEqual(
+            10,
+            Throttler(self.build_config(func=request_api)).try_limit("tag"),
+            delta=1,
+        )
+        result = throttler.try_acquire()
+        self.assertFalse(result.allowed)
+        self.assertAlmostEqual(10, result.retry_after, delta=1)
+
+    def test_reserve_paused(self):
+        throttler = Throttler(self.build_config(func=request_api))
+        throttler.report_throttled(retry_after=30)
+        result = throttler.reserve()
+        self.assertFalse(result.allowed)
+        self.assertAlmostEqual(30, result.retry_after, delta=1)
+        self.assertEqual(0, self.client.zcard(throttler.config.cache_key))
+
+    def test_wait_paused(self):
+        clock = SimulatedClock(start=1_000_000)
+        client = InMemoryRedisClient(clock=clock.monotonic, wall_clock=clock.time)
+        throttler = Throttler(
+            self.build_config(
+                func=request_api, redis_client=client, clock=clock, max_retry_times=2
+            )
+        )
+        throttler.report_throttled(retry_after=10)
+        # the pause is slept in full, not halved
+        throttler.wait("tag")
+        self.assertAlmostEqual(10, clock.monotonic(), delta=0.01)
+
+    def test_feedback(self):
+        throttler = Throttler(
+            self.build_config(
+                func=lambda status: status,
+                adaptive_feedback=lambda status: status == 429,
+            )
+        )
+        self.assertEqual(429, throttler(429))
+        self.assertEqual(4, throttler.max_requests)
+        self.assertEqual(200, throttler(200))
+
+    def test_sync_interval(self):
+        throttler = Throttler(self.build_config(adaptive_sync_interval=60))
+        self.assertEqual(8, throttler.max_requests)
+        Throttler(self.build_config()).report_throttled()
+        # cached until the next sync
+        self.assertEqual(8, throttler.max_requests)
+
+    def test_reset(self):
+        throttler = Throttler(self.build_config(adaptive_sync_interval=60))
+        throttler.report_throttled(retry_after=10)
+        self.assertEqual(4, throttler.max_requests)
+        throttler.reset()
+        self.assertFalse(self.client.exists(throttler.config.adaptive_key))
+        self.assertEqual(8, throttler.max_requests)
+        self.assertTrue(throttler.try_acquire().allowed)
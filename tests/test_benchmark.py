@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.__main__ import main
+from benchmarks.suite import IMPORTS, build_scenarios, percentile, run_suite
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(99, percentile(values, 99))
+        self.assertEqual(0.0, percentile([], 99))
+
+    def test_run_suite(self):
+        scenarios = build_scenarios(
+            ["sliding_window"], [True, False], [False, True], [1, 2], [1]
+        )
+        report = run_suite(scenarios, calls=100)
+        self.assertEqual(len(scenarios), len(report["results"]))
+        for result in report["results"]:
+            self.assertEqual(100, result["calls"])
+            self.assertGreater(result["calls_per_sec"], 0)
+            self.assertLessEqual(result["p50_us"], result["p99_us"])
+        json.dumps(report)
+
+    def test_processes(self):
+        report = run_suite(
+            build_scenarios(["sliding_window"], [True], [False], [1], [2]), calls=100
+        )
+        self.assertEqual(100, report["results"][0]["calls"])
+
+    def test_imports(self):
+        report = run_suite([], import_runs=1)
+        self.assertEqual(len(IMPORTS), len(report["imports"]))
+        for result in report["imports"]:
+            self.assertEqual(1, result["runs"])
+            self.assertGreater(result["median_ms"], 0)
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as path:
+            output = os.path.join(path, "bench.json")
+            main(
+                [
+                    "--calls",
+                    "50",
+                    "--algorithms",
+                    "sliding_window",
+                    "--threads",
+                    "1",
+                    "--pipeline",
+                    "true",
+                    "--metrics",
+                    "false",
+                    "--import-runs",
+                    "0",
+                    "--output",
+                    output,
+                ]
+            )
+            with open(output) as f:
+                report = json.load(f)
+        self.assertEqual(1, len(report["results"]))
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import contextlib
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.cli import format_rates, main, read_rates, reset_keys
+from client_throttler.clock import SimulatedClock
+from tests.mock.api import request_api
+
+
+class CLITest(unittest.TestCase):
+    def setUp(self):
+        self.client = InMemoryRedisClient()
+        self.config = ThrottlerConfig(
+            func=request_api,
+            key_prefix="cli",
+            rate="100/s",
+            redis_client=self.client,
+            enable_metric_record=True,
+            quota="1000/day",
+        )
+        for key, calls in (("a", 3), ("b", 5)):
+            throttler = Throttler(self.config.copy(key=key))
+            for _ in range(calls):
+                throttler.try_acquire()
+        Throttler(self.config.copy(key_prefix="other", key="c")).try_acquire()
+
+    def run_main(self, *args, client: InMemoryRedisClient = None) -> str:
+        output = io.StringIO()
+        with mock.patch(
+            "client_throttler.cli.create_redis_client",
+            return_value=client or self.client,
+        ), contextlib.redirect_stdout(output):
+            main(list(args))
+        return output.getvalue()
+
+    def test_read_rates(self):
+        rates = read_rates(self.client, "cli:*", window=10, batch_size=1)
+        self.assertEqual(
+            [(r.key, r.count) for r in rates], [("cli:b", 5), ("cli:a", 3)]
+        )
+        self.assertEqual(rates[0].rate, 0.5)
+        self.assertIn("cli:b", format_rates(rates, 10))
+
+    def run_load(self, enable_metric_record: bool) -> InMemoryRedisClient:
+        # 8 requests per second for 20 seconds against a 10/s limiter, ending now
+        clock = SimulatedClock(start=time.time() - 20)
+        client = InMemoryRedisClient(clock=clock.monotonic, wall_clock=clock.time)
+        throttler = Throttler(
+            self.config.copy(
+                key="load",
+                rate="10/s",
+                quota="",
+                redis_client=client,
+                clock=clock,
+                enable_metric_record=enable_metric_record,
+            )
+        )
+        for _ in range(160):
+            clock.sleep(0.125)
+            self.assertTrue(throttler.try_acquire().allowed)
+        return client
+
+    def test_rate_under_load(self):
+        for enable_metric_record in (False, True):
+            with self.subTest(enable_metric_record=enable_metric_record):
+                client = self.run_load(enable_metric_record)
+                (rate,) = read_rates(client, "cli:load", window=10, batch_size=10)
+                self.assertAlmostEqual(rate.rate, 8, delta=0.5)
+                output = self.run_main("top", "--iterations", "1", client=client)
+                self.assertRegex(output, r"cli:load\s+\d+\s+[78]\.\d\d")
+
+    def test_top(self):
+        output = self.run_main("top", "--iterations", "1", "--limit", "1")
+        self.assertIn("cli:b", output)
+        self.assertNotIn("cli:a", output)
+
+    def test_reset(self):
+        keys = reset_keys(self.client, "cli:*", batch_size=2, dry_run=True)
+        # request log, metrics and quota counter of each key
+        self.assertEqual(len(keys), 6)
+        self.assertEqual(len(self.client.keys()), 9)
+
+        output = self.run_main("reset", "--pattern", "cli:*", "--batch-size", "2")
+        self.assertEqual(output, "6 keys deleted\n")
+        self.assertEqual(len(self.client.keys()), 3)
+        self.assertTrue(all(b"other:c" in key for key in self.client.keys()))
+
+    def test_export_json(self):
+        metrics = json.loads(self.run_main("export", "--pattern", "cli:*"))
+        self.assertEqual(len(metrics), 8)
+        self.assertEqual(
+            sorted(m["count"] for m in metrics if m["func"] == "a"), [1, 2, 3]
+        )
+
+    def test_export_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.csv")
+            self.run_main("export", "--format", "csv", "--output", path)
+            with open(path, newline="") as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 9)
+        self.assertEqual(
+            set(rows[0]),
+            {"id", "metric_key", "func", "node", "count", "time", "timestamp"},
+        )
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import unittest
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.clock import LocalClock, RedisClock, SimulatedClock
+from tests.mock.api import request_api
+
+SKEW = 3600
+
+
+class SkewedRedisClient(InMemoryRedisClient):
+    def __init__(self):
+        super().__init__(wall_clock=lambda: time.time() + SKEW)
+        self.time_calls = 0
+
+    def time(self):
+        self.time_calls += 1
+        return super().time()
+
+
+class ClockTest(unittest.TestCase):
+    def test_local_clock(self):
+        clock = LocalClock()
+        self.assertAlmostEqual(time.time(), clock.time(), delta=1)
+        self.assertAlmostEqual(time.monotonic(), clock.monotonic(), delta=1)
+
+    def test_redis_clock(self):
+        client = SkewedRedisClient()
+        clock = RedisClock(client, sync_interval=60)
+        for _ in range(10):
+            self.assertAlmostEqual(time.time() + SKEW, clock.time(), delta=0.1)
+        self.assertEqual(1, client.time_calls)
+
+        clock = RedisClock(client, sync_interval=0)
+        clock.time()
+        clock.time()
+        self.assertEqual(3, client.time_calls)
+
+    def test_throttler_server_time(self):
+        client = SkewedRedisClient()
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="10/s",
+                redis_client=client,
+                enable_server_time=True,
+            )
+        )
+        for _ in range(3):
+            throttler()
+        scores = [
+            score
+            for _, score in client.zrangebyscore(
+                throttler.config.cache_key, "-inf", "+inf", withscores=True
+            )
+        ]
+        self.assertEqual(3, len(scores))
+        for score in scores:
+            self.assertAlmostEqual(time.time() + SKEW, score, delta=1)
+
+    def test_simulated_clock(self):
+        clock = SimulatedClock(start=1000)
+        self.assertEqual(0, clock.monotonic())
+        clock.sleep(1.5)
+        clock.move_to(1)
+        self.assertEqual(1.5, clock.monotonic())
+        self.assertEqual(1001.5, clock.time())
+
+    def test_throttler_simulated_clock(self):
+        clock = SimulatedClock()
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="1/s",
+                redis_client=InMemoryRedisClient(
+                    clock=clock.monotonic, wall_clock=clock.time
+                ),
+                clock=clock,
+            )
+        )
+        start = time.monotonic()
+        for _ in range(3):
+            throttler()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertGreaterEqual(clock.monotonic(), 2)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from redis.exceptions import ConnectionError
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.coalescer import Coalescer
+from tests.mock.api import request_api
+
+
+class CoalescerTest(unittest.TestCase):
+    def setUp(self):
+        self.client = InMemoryRedisClient()
+        self.config = ThrottlerConfig(
+            func=request_api,
+            rate="10/s",
+            redis_client=self.client,
+            enable_coalescing=True,
+            coalesce_max_delay=0.05,
+        )
+
+    def acquire_concurrently(self, throttler, callers):
+        barrier = threading.Barrier(callers)
+
+        def acquire(_):
+            barrier.wait()
+            return throttler.try_acquire()
+
+        with ThreadPoolExecutor(max_workers=callers) as executor:
+            return list(executor.map(acquire, range(callers)))
+
+    def test_batch(self):
+        throttler = Throttler(self.config)
+        with mock.patch.object(
+            Coalescer, "execute", autospec=True, side_effect=Coalescer.execute
+        ) as execute:
+            results = self.acquire_concurrently(throttler, 16)
+        self.assertEqual(10, sum(result.allowed for result in results))
+        self.assertLess(execute.call_count, 16)
+        self.assertEqual(
+            16, sum(len(call.args[1].requests) for call in execute.call_args_list)
+        )
+
+    def test_max_batch(self):
+        throttler = Throttler(
+            self.config.copy(coalesce_max_batch=4, coalesce_max_delay=10)
+        )
+        results = self.acquire_concurrently(throttler, 8)
+        self.assertEqual(8, sum(result.allowed for result in results))
+
+    def test_error(self):
+        throttler = Throttler(self.config)
+        with mock.patch.object(self.client, "pipeline", side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                throttler.try_acquire()
+        self.assertTrue(throttler.try_acquire().allowed)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import unittest
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.constants import Defaults
+from tests.mock.api import request_api
+
+
+class CompactionTest(unittest.TestCase):
+    def setUp(self):
+        self.client = InMemoryRedisClient()
+        self.config = ThrottlerConfig(
+            func=request_api, rate="1/s", redis_client=self.client
+        )
+
+    def add_placeholder(self, throttler, member, admitted_at):
+        self.client.zadd(
+            throttler.config.cache_key,
+            {member: admitted_at + Defaults.placeholder_offset},
+        )
+
+    def test_stale_placeholder(self):
+        throttler = Throttler(self.config)
+        self.add_placeholder(throttler, "crashed", time.time() - 120)
+        self.assertTrue(throttler.try_acquire().allowed)
+        self.assertIsNone(self.client.zscore(throttler.config.cache_key, "crashed"))
+
+    def test_fresh_placeholder(self):
+        throttler = Throttler(self.config)
+        self.add_placeholder(throttler, "admitting", time.time())
+        self.assertFalse(throttler.try_acquire().allowed)
+        self.assertIsNotNone(
+            self.client.zscore(throttler.config.cache_key, "admitting")
+        )
+
+    def test_disabled(self):
+        throttler = Throttler(self.config.copy(placeholder_timeout=0))
+        self.add_placeholder(throttler, "crashed", time.time() - 120)
+        self.assertFalse(throttler.try_acquire().allowed)
+
+    def test_size_cap(self):
+        throttler = Throttler(self.config.copy(rate="5/s", compaction_margin=2))
+        now = time.time()
+        self.client.zadd(
+            throttler.config.cache_key,
+            {f"request_{i}": now - i / 100 for i in range(20)},
+        )
+        self.assertFalse(throttler.try_acquire().allowed)
+        self.assertEqual(7, self.client.zcard(throttler.config.cache_key))
+
+    def test_size_cap_with_placeholders(self):
+        throttler = Throttler(self.config.copy(rate="5/s", compaction_margin=1))
+        for _ in range(5):
+            self.assertTrue(throttler.try_acquire().allowed)
+        # callers being admitted and bookings are not counted by the cap
+        for index in range(3):
+            self.add_placeholder(throttler, f"admitting_{index}", time.time())
+        self.client.zadd(throttler.config.cache_key, {"booked": time.time() + 0.5})
+        self.assertFalse(throttler.try_acquire().allowed)
+        self.assertEqual(
+            5, self.client.zcount(throttler.config.cache_key, "-inf", time.time())
+        )
+        self.assertEqual(9, self.client.zcard(throttler.config.cache_key))
+
+    def test_compact(self):
+        throttler = Throttler(self.config.copy(rate="5/s", compaction_margin=2))
+        now = time.time()
+        self.add_placeholder(throttler, "crashed", now - 120)
+        self.client.zadd(throttler.config.cache_key, {"expired": now - 10})
+        self.client.zadd(
+            throttler.config.cache_key,
+            {f"request_{i}": now - i / 100 for i in range(10)},
+        )
+        self.assertEqual(5, throttler.compact())
+        self.assertEqual(7, self.client.zcard(throttler.config.cache_key))
@@ -26,8 +26,9 @@ SOFTWARE.
 import unittest
 
 from client_throttler import ThrottlerConfig, setup
-from client_throttler.constants import CACHE_KEY_FORMAT
+from client_throttler.constants import CACHE_KEY_FORMAT, TimeDurationUnit
 from client_throttler.exceptions import RateParseError
+from client_throttler.rate import Rate, parse_rate
 
 
 class TestParseRate(unittest.TestCase):
@@ -46,6 +47,32 @@ class TestParseRate(unittest.TestCase):
                     (config.max_requests, config.interval), expected_output
                 )
 
+    def test_unit_alias(self):
+        test_cases = [
+            ("100/min", (100, 60)),
+            ("100/5sec", (100, 5)),
+            ("100/msec", (100, 0.001)),
+            ("100/2hour", (100, 7200)),
+            ("100/day", (100, 86400)),
+        ]
+
+        for rate_str, expected_output in test_cases:
+            with self.subTest(rate_str=rate_str):
+                self.assertEqual(parse_rate(rate_str), expected_output)
+
+        self.assertEqual(TimeDurationUnit.get_unit_value("sec"), 1)
+        self.assertEqual(TimeDurationUnit.get_unit_value("min"), 60)
+        with self.assertRaises(ValueError):
+            TimeDurationUnit.get_unit_value("mins")
+
+    def test_rate_cache(self):
+        rate = parse_rate("10/m")
+        self.assertIsInstance(rate, Rate)
+        self.assertIs(parse_rate("10/m"), rate)
+        self.assertEqual((rate.max_requests, rate.interval), (10, 60))
+        with self.assertRaises(AttributeError):
+            rate.max_requests = 20
+
     def test_invalid_rate_string(self):
         invalid_rate_strings = [
             "100",
@@ -54,6 +81,7 @@ class TestParseRate(unittest.TestCase):
             "100/-1s",
             "100/s20",
             "100/20",
+            "100/mins",
         ]
 
         for rate_str in invalid_rate_strings:
@@ -25,6 +25,7 @@ SOFTWARE.
 
 import unittest
 
+from client_throttler.constants import Unset
 from client_throttler.decorators import ThrottlerConfig, throttler
 from tests.mock.redis import redis_client
 
@@ -34,6 +35,29 @@ def request_api():
     ...
 
 
+shared_config = ThrottlerConfig(redis_client=redis_client)
+
+
+@throttler(shared_config)
+def request_api_a():
+    ...
+
+
+@throttler(shared_config)
+def request_api_b():
+    ...
+
+
 class DecoratorTest(unittest.TestCase):
     def test_decorator(self):
         request_api()
+
+    def test_shared_config(self):
+        request_api_a()
+        request_api_b()
+        self.assertIs(request_api_a.get_throttler(), request_api_a.get_throttler())
+        self.assertNotEqual(
+            request_api_a.get_throttler().config.cache_key,
+            request_api_b.get_throttler().config.cache_key,
+        )
+        self.assertIsInstance(shared_config.func, Unset)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+import time
+import unittest
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.dispatcher import Dispatcher
+from client_throttler.exceptions import RetryTimeout
+
+
+def echo(value):
+    return value
+
+
+class DispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.throttler = Throttler(
+            ThrottlerConfig(func=echo, rate="5/s", redis_client=InMemoryRedisClient())
+        )
+
+    def test_submit(self):
+        with Dispatcher(self.throttler, max_workers=2) as dispatcher:
+            futures = [dispatcher.submit(i) for i in range(5)]
+            self.assertEqual([f.result(timeout=1) for f in futures], list(range(5)))
+
+    def test_rate(self):
+        start = time.monotonic()
+        with Dispatcher(self.throttler, max_workers=2) as dispatcher:
+            futures = [dispatcher.submit(i) for i in range(7)]
+            for future in futures:
+                future.result(timeout=3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+    def test_priority(self):
+        order = []
+        lock = threading.Lock()
+
+        def record(value):
+            with lock:
+                order.append(value)
+
+        throttler = Throttler(self.throttler.config.copy(func=record, rate="1/s"))
+        with Dispatcher(throttler, max_workers=1) as dispatcher:
+            dispatcher.submit("first").result(timeout=1)
+            futures = [
+                dispatcher.submit("low"),
+                dispatcher.submit("high", priority=1),
+            ]
+            for future in futures:
+                future.result(timeout=3)
+        self.assertEqual(order, ["first", "high", "low"])
+
+    def test_timeout(self):
+        throttler = Throttler(self.throttler.config.copy(rate="1/s"))
+        with Dispatcher(throttler) as dispatcher:
+            dispatcher.submit(1).result(timeout=1)
+            future = dispatcher.submit(2, timeout=0.2)
+            with self.assertRaises(RetryTimeout):
+                future.result(timeout=1)
+
+    def test_shutdown(self):
+        throttler = Throttler(self.throttler.config.copy(rate="1/s"))
+        dispatcher = Dispatcher(throttler)
+        dispatcher.submit(1).result(timeout=1)
+        future = dispatcher.submit(2)
+        dispatcher.shutdown(cancel_pending=True)
+        self.assertTrue(future.cancelled())
+        self.assertEqual(dispatcher.pending, 0)
+        with self.assertRaises(RuntimeError):
+            dispatcher.submit(3)
+
+    def test_shutdown_without_wait(self):
+        throttler = Throttler(self.throttler.config.copy(rate="20/s"))
+        dispatcher = Dispatcher(throttler, max_workers=2)
+        futures = [dispatcher.submit(i) for i in range(12)]
+        dispatcher.shutdown(wait=False)
+        # pending calls are still released, then the timer thread shuts the executor down
+        self.assertEqual([f.result(timeout=3) for f in futures], list(range(12)))
+        dispatcher._timer.join(timeout=1)
+        self.assertFalse(dispatcher._timer.is_alive())
+        with self.assertRaises(RuntimeError):
+            dispatcher.executor.submit(echo, 1)
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+
+from redis.exceptions import ConnectionError
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.breaker import CircuitBreaker
+from client_throttler.constants import FailurePolicy
+from client_throttler.exceptions import BackendUnavailable, ConfigError
+from client_throttler.local import LocalRateLimiter
+from client_throttler.redis import MockPipeline
+from tests.mock.api import request_api
+from tests.mock.redis import fake_redis_client
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyRedisClient:
+    """
+    Fail every command while down, count the commands sent
+    """
+
+    def __init__(self):
+        self.down = True
+        self.calls = 0
+        self._client = InMemoryRedisClient()
+
+    def pipeline(self, transaction: bool = False) -> MockPipeline:
+        return MockPipeline(self)
+
+    def __getattr__(self, name):
+        func = getattr(self._client, name)
+
+        def command(*args, **kwargs):
+            self.calls += 1
+            if self.down:
+                raise ConnectionError
+            return func(*args, **kwargs)
+
+        return command
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_circuit_breaker(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=clock)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        breaker.record_failure()
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        self.assertFalse(breaker.allow())
+
+        # probe fails
+        clock.now = 10
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+
+        # probe succeeds
+        clock.now = 20
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        self.assertTrue(breaker.allow())
+
+
+class LocalRateLimiterTest(unittest.TestCase):
+    def test_acquire(self):
+        clock = FakeClock()
+        limiter = LocalRateLimiter(max_requests=2, interval=1, clock=clock)
+        self.assertEqual(0, limiter.acquire())
+        clock.now = 0.5
+        self.assertEqual(0, limiter.acquire())
+        self.assertEqual(0.5, limiter.acquire())
+        clock.now = 1
+        self.assertEqual(0, limiter.acquire())
+        limiter.reset()
+        self.assertEqual(0, limiter.acquire())
+
+
+class FailurePolicyTest(unittest.TestCase):
+    def build_config(self, **kwargs) -> ThrottlerConfig:
+        return ThrottlerConfig(
+            func=request_api,
+            rate="2/s",
+            redis_client=fake_redis_client,
+            enable_sleep_wait=False,
+            **kwargs,
+        )
+
+    def test_raise(self):
+        with self.assertRaises(ConnectionError):
+            Throttler(self.build_config())()
+
+    def test_open(self):
+        throttler = Throttler(self.build_config(failure_policy=FailurePolicy.OPEN))
+        for _ in range(5):
+            throttler()
+
+    def test_closed(self):
+        throttler = Throttler(self.build_config(failure_policy=FailurePolicy.CLOSED))
+        with self.assertRaises(BackendUnavailable):
+            throttler()
+
+    def test_local(self):
+        throttler = Throttler(
+            self.build_config(failure_policy=FailurePolicy.LOCAL, fallback_nodes=2)
+        )
+        self.assertEqual(1, throttler.local_limiter.max_requests)
+        self.assertEqual(0, throttler.try_limit("a"))
+        self.assertGreater(throttler.try_limit("b"), 0)
+
+    def test_local_with_redis_reads(self):
+        # the server clock and the adaptive pause are read from redis, they must not escape the failure policy
+        for options in ({"enable_server_time": True}, {"enable_adaptive_rate": True}):
+            with self.subTest(**options):
+                throttler = Throttler(
+                    self.build_config(
+                        failure_policy=FailurePolicy.LOCAL,
+                        circuit_breaker_threshold=1,
+                        fallback_nodes=2,
+                        **options,
+                    )
+                )
+                self.assertEqual(0, throttler.try_limit("a"))
+                self.assertGreater(throttler.try_limit("b"), 0)
+                self.assertGreater(throttler.try_limit("c"), 0)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ConfigError):
+            Throttler(self.build_config(failure_policy="unknown"))
+        with self.assertRaises(ConfigError):
+            Throttler(self.build_config(fallback_nodes=0))
+
+    def test_circuit_breaker(self):
+        client = FlakyRedisClient()
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="100/s",
+                redis_client=client,
+                failure_policy=FailurePolicy.OPEN,
+                circuit_breaker_threshold=2,
+                circuit_breaker_cooldown=60,
+            )
+        )
+        for _ in range(10):
+            throttler()
+        # redis is skipped once the breaker opens
+        self.assertEqual(2, client.calls)
+        self.assertEqual(CircuitBreaker.OPEN, throttler.breaker.state)
+
+        # raise policy fails fast once the breaker opens
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="100/s",
+                redis_client=client,
+                circuit_breaker_threshold=1,
+            )
+        )
+        with self.assertRaises(ConnectionError):
+            throttler()
+        with self.assertRaises(BackendUnavailable):
+            throttler()
+
+    def test_reserve_circuit_breaker(self):
+        client = FlakyRedisClient()
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="4/s",
+                redis_client=client,
+                failure_policy=FailurePolicy.LOCAL,
+                circuit_breaker_threshold=1,
+                circuit_breaker_cooldown=60,
+            )
+        )
+        self.assertTrue(throttler.reserve().allowed)
+        self.assertEqual(1, client.calls)
+        # redis is skipped once the breaker opens, and each reservation takes one local permit
+        results = [throttler.reserve() for _ in range(4)]
+        self.assertEqual(1, client.calls)
+        self.assertEqual([r.allowed for r in results], [True] * 3 + [False])
+
+    def test_circuit_breaker_release(self):
+        client = FlakyRedisClient()
+        config = ThrottlerConfig(
+            func=request_api,
+            rate="100/s",
+            redis_client=client,
+            failure_policy=FailurePolicy.OPEN,
+            circuit_breaker_threshold=1,
+            circuit_breaker_cooldown=60,
+            max_in_flight=2,
+        )
+        throttler = Throttler(config)
+        for _ in range(5):
+            throttler()
+        # the admission opens the breaker, leases are not released in redis after that
+        self.assertEqual(1, client.calls)
+
+        adaptive = Throttler(config.copy(max_in_flight=0, enable_adaptive_rate=True))
+        adaptive.breaker.record_failure()
+        adaptive.report_throttled(retry_after=10)
+        self.assertEqual(1, client.calls)
+
+    def test_circuit_breaker_recover(self):
+        client = FlakyRedisClient()
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="100/s",
+                redis_client=client,
+                failure_policy=FailurePolicy.OPEN,
+                circuit_breaker_threshold=1,
+                circuit_breaker_cooldown=0,
+            )
+        )
+        throttler()
+        client.down = False
+        throttler()
+        self.assertEqual(CircuitBreaker.CLOSED, throttler.breaker.state)
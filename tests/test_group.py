@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+from unittest import mock
+
+from redis.exceptions import ConnectionError
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.exceptions import ConfigError
+from client_throttler.group import ThrottlerGroup
+from tests.mock.api import request_api
+from tests.mock.redis import fake_redis_client
+
+
+class ThrottlerGroupTest(unittest.TestCase):
+    def setUp(self):
+        self.client = InMemoryRedisClient()
+        self.throttlers = [
+            Throttler(
+                ThrottlerConfig(
+                    func=request_api,
+                    key=f"upstream_{i}",
+                    rate=rate,
+                    redis_client=self.client,
+                )
+            )
+            for i, rate in enumerate(["1/s", "2/s", "3/s"])
+        ]
+
+    def test_try_acquire(self):
+        group = ThrottlerGroup(self.throttlers)
+        result = group.try_acquire()
+        self.assertTrue(result.allowed)
+        self.assertEqual([0, 1, 2], [r.remaining for r in result.results])
+
+        result = group.try_acquire()
+        self.assertFalse(result.allowed)
+        self.assertEqual([False, True, True], [r.allowed for r in result.results])
+        self.assertAlmostEqual(1, result.retry_after, delta=0.1)
+        self.assertEqual(
+            [1, 2, 2],
+            [self.client.zcard(t.config.cache_key) for t in self.throttlers],
+        )
+
+    def test_all_or_nothing(self):
+        group = ThrottlerGroup(self.throttlers, all_or_nothing=True)
+        self.assertTrue(group.try_acquire().allowed)
+        result = group.try_acquire()
+        self.assertFalse(result.allowed)
+        self.assertEqual([False] * 3, [r.allowed for r in result.results])
+        self.assertGreater(result.results[0].retry_after, 0)
+        self.assertEqual(
+            [1, 1, 1],
+            [self.client.zcard(t.config.cache_key) for t in self.throttlers],
+        )
+
+    def test_round_trips(self):
+        group = ThrottlerGroup(self.throttlers)
+        with mock.patch.object(
+            self.client, "pipeline", wraps=self.client.pipeline
+        ) as pipeline:
+            group.try_acquire()
+        self.assertEqual(2, pipeline.call_count)
+
+    def test_redis_client(self):
+        other = Throttler(
+            ThrottlerConfig(
+                func=request_api, rate="1/s", redis_client=InMemoryRedisClient()
+            )
+        )
+        with self.assertRaises(ConfigError):
+            ThrottlerGroup([self.throttlers[0], other])
+        with self.assertRaises(ConfigError):
+            ThrottlerGroup([])
+
+    def test_quota(self):
+        quota = Throttler(
+            self.throttlers[2].config.copy(key="quota", rate="", quota="10/day")
+        )
+        with self.assertRaises(ConfigError):
+            ThrottlerGroup([self.throttlers[0], quota])
+
+        # counted on top of a rate, and given back on rollback
+        limited = Throttler(quota.config.copy(rate="5/s", quota="1/day"))
+        group = ThrottlerGroup([self.throttlers[2], limited], all_or_nothing=True)
+        self.assertTrue(group.try_acquire().allowed)
+        result = group.try_acquire()
+        self.assertEqual([False, False], [r.allowed for r in result.results])
+        self.assertEqual(1, limited.status().quota_count)
+
+    def test_sharding(self):
+        sharded = Throttler(
+            self.throttlers[0].config.copy(key="sharded", enable_sharding=True)
+        )
+        with self.assertRaises(ConfigError):
+            ThrottlerGroup([self.throttlers[1], sharded])
+
+    def test_failure_policy(self):
+        throttlers = [
+            Throttler(t.config.copy(failure_policy="open")) for t in self.throttlers
+        ]
+        group = ThrottlerGroup(throttlers)
+        with mock.patch.object(self.client, "pipeline", side_effect=ConnectionError):
+            self.assertTrue(group.try_acquire().allowed)
+
+    def test_failure_policy_adaptive(self):
+        throttlers = [
+            Throttler(
+                t.config.copy(
+                    redis_client=fake_redis_client,
+                    failure_policy="open",
+                    enable_adaptive_rate=True,
+                    circuit_breaker_threshold=1,
+                )
+            )
+            for t in self.throttlers
+        ]
+        group = ThrottlerGroup(throttlers)
+        # the adaptive state is read from redis before the admission, its failure opens the breaker
+        self.assertTrue(group.try_acquire().allowed)
+        self.assertTrue(all(t.breaker.state == t.breaker.OPEN for t in throttlers))
+        self.assertTrue(group.try_acquire().allowed)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+
+from redis.exceptions import ConnectionError
+
+from client_throttler import Throttler, ThrottlerConfig
+from client_throttler.constants import HookPoint
+from client_throttler.hooks import HookEvent, OpenTelemetryHook
+from tests.mock.api import request_api
+from tests.mock.redis import fake_redis_client, redis_client
+
+
+class FakeSpan:
+    def __init__(self, name, start_time, attributes):
+        self.name = name
+        self.start_time = start_time
+        self.end_time = None
+        self.attributes = attributes
+        self.exceptions = []
+
+    def record_exception(self, error):
+        self.exceptions.append(error)
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class FakeTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time=None, attributes=None):
+        span = FakeSpan(name, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+
+class HookTest(unittest.TestCase):
+    def test_hooks(self):
+        events = []
+        config = ThrottlerConfig(
+            func=request_api,
+            rate="1/50ms",
+            redis_client=redis_client,
+            enable_metric_record=True,
+            hooks=[events.append],
+        )
+        for _ in range(2):
+            Throttler(config)()
+
+        names = [event.name for event in events]
+        for name in [
+            HookPoint.GET_REQUEST_COUNT,
+            HookPoint.GET_WAIT_TIME,
+            HookPoint.UPDATE_TIME,
+            HookPoint.RECORD_METRIC,
+            HookPoint.SLEEP,
+        ]:
+            self.assertIn(name, names)
+        for event in events:
+            self.assertTrue(event.success)
+            self.assertGreaterEqual(event.duration, 0)
+            self.assertEqual(config.cache_key, event.key)
+        sleep_event = next(event for event in events if event.name == HookPoint.SLEEP)
+        self.assertGreater(sleep_event.duration, 0)
+
+    def test_no_hooks(self):
+        throttler = Throttler(
+            ThrottlerConfig(func=request_api, rate="10/s", redis_client=redis_client)
+        )
+        # the undecorated methods are bound, the wrappers are skipped
+        self.assertIs(throttler.update_time.__func__, Throttler.update_time.__wrapped__)
+        self.assertIs(throttler.degrade.__func__, Throttler.degrade.__wrapped__)
+        self.assertTrue(throttler.try_acquire().allowed)
+
+        hooked = Throttler(throttler.config.copy(hooks=[lambda event: None]))
+        self.assertIs(hooked.update_time.__func__, Throttler.update_time)
+
+    def test_hook_error(self):
+        events = []
+
+        def broken_hook(event: HookEvent):
+            raise ValueError
+
+        config = ThrottlerConfig(
+            func=request_api,
+            rate="1/s",
+            redis_client=fake_redis_client,
+            enable_pipeline=False,
+            hooks=[broken_hook, events.append],
+        )
+        with self.assertRaises(ConnectionError):
+            Throttler(config)()
+        self.assertEqual(HookPoint.GET_REQUEST_COUNT, events[0].name)
+        self.assertFalse(events[0].success)
+        self.assertIsInstance(events[0].error, ConnectionError)
+
+    def test_open_telemetry_hook(self):
+        tracer = FakeTracer()
+        config = ThrottlerConfig(
+            func=request_api,
+            rate="100/s",
+            redis_client=redis_client,
+            hooks=[OpenTelemetryHook(tracer)],
+        )
+        Throttler(config)()
+        span = tracer.spans[0]
+        self.assertEqual(f"client_throttler.{HookPoint.GET_REQUEST_COUNT}", span.name)
+        self.assertGreaterEqual(span.end_time, span.start_time)
+        self.assertIn("client_throttler.count", span.attributes)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.exceptions import TooManyRequests
+from tests.mock.api import request_api
+
+
+class InFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.client = InMemoryRedisClient()
+
+    def build_config(self, **kwargs) -> ThrottlerConfig:
+        params = dict(
+            func=request_api,
+            rate="1000/s",
+            redis_client=self.client,
+            max_in_flight=1,
+            in_flight_poll_interval=0.01,
+        )
+        params.update(kwargs)
+        return ThrottlerConfig(**params)
+
+    def test_release(self):
+        throttler = Throttler(self.build_config())
+        for _ in range(3):
+            throttler()
+        self.assertEqual(0, self.client.zcard(throttler.config.in_flight_key))
+
+    def test_limit(self):
+        throttler = None
+        wait_times = []
+
+        def func():
+            wait_times.append(throttler.try_limit("other"))
+
+        throttler = Throttler(self.build_config(func=func))
+        throttler()
+        self.assertGreater(wait_times[0], 0)
+        self.assertLessEqual(wait_times[0], 0.01)
+        # the rejected placeholder and lease are removed
+        self.assertEqual(1, self.client.zcard(throttler.config.cache_key))
+        self.assertEqual(0, self.client.zcard(throttler.config.in_flight_key))
+
+    def test_no_sleep(self):
+        throttler = None
+
+        def func():
+            Throttler(self.build_config(func=func, enable_sleep_wait=False))()
+
+        throttler = Throttler(self.build_config(func=func))
+        with self.assertRaises(TooManyRequests):
+            throttler()
+        self.assertEqual(0, self.client.zcard(throttler.config.in_flight_key))
+
+    def test_threads(self):
+        lock = threading.Lock()
+        state = {"running": 0, "max_running": 0}
+
+        def func():
+            with lock:
+                state["running"] += 1
+                state["max_running"] = max(state["max_running"], state["running"])
+            time.sleep(0.005)
+            with lock:
+                state["running"] -= 1
+
+        throttler = Throttler(self.build_config(func=func, max_in_flight=2))
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            for future in [executor.submit(throttler) for _ in range(30)]:
+                future.result()
+        self.assertEqual(2, state["max_running"])
+
+    def test_lease_expire(self):
+        throttler = Throttler(self.build_config(lease_timeout=0.05))
+        now = throttler.clock.time()
+        # a crashed caller never releases its lease
+        admission = throttler.get_admission(now - 1, "crashed", now)
+        self.assertEqual(1, admission.in_flight)
+        self.assertGreater(throttler.try_limit("next"), 0)
+        time.sleep(0.05)
+        self.assertEqual(0, throttler.try_limit("next"))
+
+    def test_reset(self):
+        throttler = Throttler(self.build_config())
+        self.assertTrue(throttler.try_acquire().allowed)
+        self.assertFalse(throttler.try_acquire().allowed)
+        # the lease of the unreleased permit is removed with the request log
+        throttler.reset()
+        result = throttler.try_acquire()
+        self.assertTrue(result.allowed)
+        throttler.release(result.tag)
+        self.assertEqual(0, self.client.zcard(throttler.config.in_flight_key))
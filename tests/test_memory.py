@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import threading
+import unittest
+from datetime import timedelta
+
+from client_throttler.memory import InMemoryRedisClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class InMemoryRedisClientTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.client = InMemoryRedisClient(clock=self.clock)
+
+    def test_sorted_set(self):
+        self.assertEqual(3, self.client.zadd("key", {"b": 1, "a": 1, b"c": 2}))
+        self.assertEqual(0, self.client.zadd("key", {"c": 0}))
+        self.assertEqual(
+            [b"c", b"a", b"b"], self.client.zrangebyscore("key", "-inf", "+inf")
+        )
+        self.assertEqual(
+            [(b"a", 1.0)],
+            self.client.zrangebyscore("key", 1, 1, start=0, num=1, withscores=True),
+        )
+        self.assertEqual([b"b"], self.client.zrangebyscore("key", 1, 2, start=1))
+        self.assertEqual(2, self.client.zcount("key", "(0", 1))
+        self.assertEqual(1.0, self.client.zscore("key", "a"))
+        self.assertEqual(3, self.client.zcard("key"))
+        self.assertEqual([b"a", b"b"], self.client.zrange("key", 1, -1))
+        self.assertEqual(1, self.client.zrem("key", "a", "missing"))
+        self.assertEqual(1, self.client.zremrangebyscore("key", 0, "(1"))
+        self.assertEqual([b"b"], self.client.zrangebyscore("key", "-inf", "+inf"))
+        self.assertEqual(1, self.client.zremrangebyscore("key", "-inf", "+inf"))
+        self.assertEqual(0, self.client.exists("key"))
+
+    def test_rev_range_by_score(self):
+        self.client.zadd("key", {str(index): index for index in range(10)})
+        self.assertEqual(
+            [b"8", b"7"], self.client.zrevrangebyscore("key", "(9", 2, start=0, num=2)
+        )
+        self.assertEqual(
+            [(b"4", 4.0), (b"3", 3.0)],
+            self.client.zrevrangebyscore("key", 5, 3, start=1, withscores=True),
+        )
+        self.assertEqual([], self.client.zrevrangebyscore("key", 5, 3, start=5))
+        self.assertEqual([], self.client.zrevrangebyscore("missing", "+inf", "-inf"))
+
+    def test_remove_range_by_rank(self):
+        self.client.zadd("key", {str(index): index for index in range(10)})
+        self.assertEqual(3, self.client.zremrangebyrank("key", 7, -1))
+        self.assertEqual(2, self.client.zremrangebyrank("key", 0, 1))
+        self.assertEqual(
+            [b"2", b"6"],
+            [self.client.zrange("key", 0, 0)[0], self.client.zrange("key", -1, -1)[0]],
+        )
+
+    def test_expire(self):
+        self.assertFalse(self.client.expire("key", 10))
+        self.client.zadd("key", {"a": 1})
+        self.assertEqual(-1, self.client.ttl("key"))
+        self.assertTrue(self.client.expire("key", timedelta(seconds=10)))
+        self.assertEqual(10, self.client.ttl("key"))
+        self.clock.now = 9.9
+        self.assertEqual(1, self.client.zcard("key"))
+        self.assertEqual([b"key"], self.client.keys("k*"))
+        self.clock.now = 10
+        self.assertEqual(0, self.client.zcard("key"))
+        self.assertEqual(-2, self.client.ttl("key"))
+        self.assertEqual([], self.client.keys())
+
+    def test_counter(self):
+        self.assertIsNone(self.client.get("key"))
+        self.assertEqual(1, self.client.incr("key"))
+        self.assertEqual(3, self.client.incrby("key", 2))
+        self.assertEqual(2, self.client.decr("key"))
+        self.assertEqual(b"2", self.client.get("key"))
+
+    def test_expireat(self):
+        client = InMemoryRedisClient(clock=self.clock, wall_clock=lambda: 1000.0)
+        self.assertFalse(client.expireat("key", 1010))
+        client.incr("key")
+        self.assertTrue(client.expireat("key", 1010))
+        self.assertEqual(10, client.ttl("key"))
+        self.clock.now = 10
+        self.assertIsNone(client.get("key"))
+
+    def test_delete(self):
+        self.client.zadd("a", {"a": 1})
+        self.client.zadd("b", {"b": 1})
+        self.assertEqual(2, self.client.delete("a", b"b", "c"))
+        self.client.zadd("a", {"a": 1})
+        self.assertTrue(self.client.flushall())
+        self.assertEqual(0, self.client.exists("a"))
+
+    def test_pipeline(self):
+        with self.client.pipeline() as pipe:
+            pipe.zadd("key", {"a": 1})
+            pipe.zcard("key")
+            self.assertEqual([1, 1], pipe.execute())
+
+    def test_concurrency(self):
+        def add(index):
+            for member in range(1000):
+                self.client.zadd("key", {f"{index}-{member}": member})
+                self.client.zremrangebyscore("key", 0, member - 10)
+
+        threads = [threading.Thread(target=add, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(40, self.client.zcard("key"))
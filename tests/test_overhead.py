@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import tempfile
+import unittest
+
+from benchmarks.overhead import (
+    NullRedisClient,
+    build_paths,
+    load_baseline,
+    main,
+    run_overhead,
+)
+from client_throttler import Throttler, ThrottlerConfig
+from tests.mock.api import request_api
+
+
+class OverheadTest(unittest.TestCase):
+    def test_null_backend(self):
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api, rate="1/s", redis_client=NullRedisClient()
+            )
+        )
+        for _ in range(3):
+            self.assertTrue(throttler.try_acquire().allowed)
+
+    def test_run_overhead(self):
+        results = run_overhead(calls=100, repeat=1, max_us=1e6)
+        self.assertEqual(list(build_paths()), [result.path for result in results])
+        for result in results:
+            self.assertGreater(result.us_per_call, 0)
+            self.assertTrue(result.passed)
+
+    def test_threshold(self):
+        with self.assertRaises(SystemExit) as context:
+            main(["--calls", "10", "--repeat", "1", "--max-us", "0"])
+        self.assertIn("per-call overhead above", str(context.exception.code))
+
+    def test_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            main(
+                ["--calls", "10", "--repeat", "1", "--max-us", "1e6", "--output", path]
+            )
+            baseline = load_baseline(path)
+            self.assertEqual(list(build_paths()), list(baseline))
+            # a regression relative to the recorded baseline fails within the absolute budget
+            results = run_overhead(
+                calls=10,
+                repeat=1,
+                max_us=1e6,
+                baseline={path: 1e-6 for path in baseline},
+            )
+            self.assertFalse(any(result.passed for result in results))
+            self.assertTrue(all(result.max_us_per_call < 1e-5 for result in results))
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import unittest
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.exceptions import ConfigError
+from tests.mock.api import request_api
+
+
+class PacingTest(unittest.TestCase):
+    def setUp(self):
+        self.config = ThrottlerConfig(
+            func=request_api,
+            rate="10/s",
+            redis_client=InMemoryRedisClient(),
+            enable_pacing=True,
+        )
+
+    def test_parse_pacing(self):
+        config = self.config.copy(burst=4)
+        self.assertEqual(config.parse_pacing("10/s", 4), (4, 0.4))
+        self.assertEqual(config.pacing_burst, 4)
+        self.assertAlmostEqual(config.pacing_interval, 0.4)
+        for burst in (0, 11):
+            with self.subTest(burst=burst):
+                with self.assertRaises(ConfigError):
+                    Throttler(self.config.copy(burst=burst))
+
+    def test_pacing(self):
+        throttler = Throttler(self.config)
+        self.assertTrue(throttler.try_acquire().allowed)
+        result = throttler.try_acquire()
+        self.assertFalse(result.allowed)
+        self.assertAlmostEqual(result.retry_after, 0.1, delta=0.01)
+        time.sleep(result.retry_after + 0.001)
+        self.assertTrue(throttler.try_acquire().allowed)
+
+    def test_burst(self):
+        throttler = Throttler(self.config.copy(burst=3))
+        results = [throttler.try_acquire() for _ in range(4)]
+        self.assertEqual([r.allowed for r in results], [True] * 3 + [False])
+        self.assertAlmostEqual(results[-1].retry_after, 0.3, delta=0.01)
+
+    def test_reserve(self):
+        throttler = Throttler(self.config.copy(burst=2))
+        results = [throttler.reserve() for _ in range(6)]
+        self.assertTrue(all(r.allowed for r in results))
+        self.assertEqual(
+            [round(r.retry_after, 1) for r in results], [0, 0, 0.2, 0.2, 0.4, 0.4]
+        )
+
+    def test_wait(self):
+        throttler = Throttler(self.config.copy(burst=1))
+        start = time.monotonic()
+        for _ in range(4):
+            throttler()
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+
+from client_throttler.memory import InMemoryRedisClient
+from client_throttler.redis import MockPipeline
+
+
+class MockPipelineTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = InMemoryRedisClient()
+
+    def test_execute(self):
+        pipe = MockPipeline(self.client)
+        pipe.zadd("key", {"a": 1, "b": 2}).zcard("key")
+        pipe.zrangebyscore("key", 0, 1)
+        self.assertEqual(len(pipe), 3)
+        self.assertEqual(pipe.execute(), [2, 2, [b"a"]])
+        self.assertEqual(len(pipe), 0)
+        self.assertEqual(pipe.execute(), [])
+
+    def test_unlisted_command(self):
+        pipe = MockPipeline(self.client)
+        pipe.zadd("key", {"a": 1})
+        pipe.zscore("key", "a")
+        self.assertEqual(pipe.execute(), [1, 1])
+
+    def test_error(self):
+        pipe = MockPipeline(self.client)
+        pipe.zcard("key")
+        pipe.unknown_command("key")
+        with self.assertRaises(AttributeError):
+            pipe.execute()
+        self.assertEqual(len(pipe), 0)
+
+        pipe.zcard("key")
+        pipe.unknown_command("key")
+        results = pipe.execute(raise_on_error=False)
+        self.assertEqual(results[0], 0)
+        self.assertIsInstance(results[1], AttributeError)
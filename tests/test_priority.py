@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.exceptions import ConfigError
+from tests.mock.api import request_api
+
+
+class PriorityTest(unittest.TestCase):
+    def setUp(self):
+        self.config = ThrottlerConfig(
+            func=request_api,
+            rate="10/s",
+            redis_client=InMemoryRedisClient(),
+            priority_shares={1: 0.2, 2: 0.1},
+        )
+
+    def test_reserved_share(self):
+        low = Throttler(self.config.copy(priority=0))
+        medium = Throttler(self.config.copy(priority=1))
+        high = Throttler(self.config.copy(priority=2))
+        self.assertEqual(low.max_requests, 7)
+        self.assertEqual(medium.max_requests, 9)
+        self.assertEqual(high.max_requests, 10)
+
+        results = [low.try_acquire().allowed for _ in range(8)]
+        self.assertEqual(results, [True] * 7 + [False])
+        self.assertTrue(medium.try_acquire().allowed)
+        self.assertTrue(medium.try_acquire().allowed)
+        self.assertFalse(medium.try_acquire().allowed)
+        self.assertTrue(high.try_acquire().allowed)
+        self.assertFalse(high.try_acquire().allowed)
+
+    def test_no_shares(self):
+        throttler = Throttler(self.config.copy(priority_shares={}))
+        self.assertEqual(throttler.max_requests, 10)
+
+    def test_invalid_shares(self):
+        for shares in ({1: 1}, {1: -0.1}, {1: 0.5, 2: 0.5}):
+            with self.subTest(shares=shares):
+                with self.assertRaises(ConfigError):
+                    Throttler(self.config.copy(priority_shares=shares))
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.clock import SimulatedClock
+from client_throttler.exceptions import ConfigError, RateParseError
+from client_throttler.quota import Quota, get_window, parse_quota
+from tests.mock.api import request_api
+
+# 2026-12-31 23:00:00 UTC
+NEW_YEAR_EVE = datetime(2026, 12, 31, 23, tzinfo=timezone.utc).timestamp()
+
+
+class QuotaTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimulatedClock(start=NEW_YEAR_EVE)
+        self.redis_client = InMemoryRedisClient(
+            clock=self.clock.monotonic, wall_clock=self.clock.time
+        )
+        self.config = ThrottlerConfig(
+            func=request_api,
+            rate="",
+            quota="3/day",
+            redis_client=self.redis_client,
+            clock=self.clock,
+            enable_sleep_wait=False,
+        )
+
+    def test_parse_quota(self):
+        self.assertEqual(parse_quota("10000/day"), Quota(10000, "day"))
+        self.assertEqual(parse_quota("1000/mo"), Quota(1000, "month"))
+        for quota in ("10/2day", "10/week", "day"):
+            with self.subTest(quota=quota):
+                with self.assertRaises(RateParseError):
+                    parse_quota(quota)
+
+    def test_window(self):
+        def to_datetime(timestamps):
+            return [datetime.fromtimestamp(t, timezone.utc) for t in timestamps]
+
+        cases = {
+            "hour": (datetime(2026, 12, 31, 23), datetime(2027, 1, 1)),
+            "day": (datetime(2026, 12, 31), datetime(2027, 1, 1)),
+            "month": (datetime(2026, 12, 1), datetime(2027, 1, 1)),
+            "year": (datetime(2026, 1, 1), datetime(2027, 1, 1)),
+        }
+        for unit, window in cases.items():
+            with self.subTest(unit=unit):
+                self.assertEqual(
+                    to_datetime(get_window(unit, NEW_YEAR_EVE + 1, timezone.utc)),
+                    [moment.replace(tzinfo=timezone.utc) for moment in window],
+                )
+        # 23:00 UTC is already the next day at UTC+8
+        start, end = get_window("day", NEW_YEAR_EVE, timezone(timedelta(hours=8)))
+        self.assertEqual(start, NEW_YEAR_EVE - 7 * 3600)
+        self.assertEqual(end, NEW_YEAR_EVE + 17 * 3600)
+
+    def test_quota_only(self):
+        throttler = Throttler(self.config)
+        results = [throttler.try_acquire() for _ in range(4)]
+        self.assertEqual([r.allowed for r in results], [True] * 3 + [False])
+        self.assertEqual([r.remaining for r in results[:3]], [2, 1, 0])
+        self.assertEqual(results[-1].retry_after, 3600)
+        # rejected requests are not counted
+        self.assertEqual(
+            self.redis_client.get(throttler.get_quota_window(self.clock.time())[0]),
+            b"3",
+        )
+        self.assertEqual(self.redis_client.keys("client_throttler:*"), [])
+
+        self.clock.advance(3600)
+        self.assertTrue(throttler.try_acquire().allowed)
+
+    def test_counter_expiry(self):
+        throttler = Throttler(self.config)
+        throttler.try_acquire()
+        key, _ = throttler.get_quota_window(self.clock.time())
+        self.assertGreater(self.redis_client.ttl(key), 3600)
+        self.clock.advance(3 * 3600)
+        self.assertIsNone(self.redis_client.get(key))
+
+    def test_with_rate(self):
+        throttler = Throttler(self.config.copy(rate="2/s"))
+        results = [throttler.try_acquire() for _ in range(3)]
+        self.assertEqual([r.allowed for r in results], [True, True, False])
+        self.assertEqual(results[-1].retry_after, 1)
+        self.assertEqual([r.remaining for r in results[:2]], [1, 0])
+
+        self.clock.advance(1.001)
+        results = [throttler.try_acquire() for _ in range(2)]
+        self.assertEqual([r.allowed for r in results], [True, False])
+        self.assertAlmostEqual(results[-1].retry_after, 3598.999, places=3)
+        self.assertFalse(throttler.reserve().allowed)
+
+    def test_wait(self):
+        throttler = Throttler(self.config.copy(quota="2/h", enable_sleep_wait=True))
+        for _ in range(3):
+            throttler()
+        self.assertAlmostEqual(self.clock.time(), NEW_YEAR_EVE + 3600, delta=0.001)
+
+    def test_reset(self):
+        throttler = Throttler(self.config)
+        for _ in range(3):
+            throttler.try_acquire()
+        throttler.reset()
+        self.assertTrue(throttler.try_acquire().allowed)
+
+    def test_invalid_config(self):
+        with self.assertRaises(ConfigError):
+            Throttler(self.config.copy(rate="1/s", enable_sharding=True))
+        with self.assertRaises(ConfigError):
+            Throttler(self.config.copy(enable_pacing=True))
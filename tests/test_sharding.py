@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import unittest
+from unittest import mock
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.exceptions import ConfigError
+from tests.mock.api import request_api
+
+
+class ShardingTest(unittest.TestCase):
+    def setUp(self):
+        self.client = InMemoryRedisClient()
+        self.config = ThrottlerConfig(
+            func=request_api,
+            rate="10/s",
+            redis_client=self.client,
+            enable_sharding=True,
+            shard_sync_interval=0.05,
+        )
+
+    def test_share(self):
+        first = Throttler(self.config)
+        self.assertEqual(1, first.shard.live_nodes)
+        self.assertEqual(10, first.shard.limiter.max_requests)
+
+        second = Throttler(self.config)
+        self.assertEqual(2, second.shard.live_nodes)
+        self.assertEqual(5, second.shard.limiter.max_requests)
+
+        time.sleep(0.06)
+        self.assertEqual(2, first.shard.live_nodes)
+        results = [first.try_acquire().allowed for _ in range(6)]
+        self.assertEqual([True] * 5 + [False], results)
+
+    def test_share_above_rate(self):
+        # more nodes than permits, each node admits one request per 4.1 seconds
+        for i in range(40):
+            self.client.zadd(self.config.shard_key, {f"node_{i}": time.time()})
+        throttler = Throttler(self.config)
+        self.assertEqual(41, throttler.shard.live_nodes)
+        self.assertEqual(1, throttler.shard.limiter.max_requests)
+        self.assertAlmostEqual(4.1, throttler.shard.limiter.interval)
+        self.assertTrue(throttler.try_acquire().allowed)
+        result = throttler.try_acquire()
+        self.assertFalse(result.allowed)
+        self.assertAlmostEqual(4.1, result.retry_after, delta=0.1)
+
+        # the remainder of the division is spread over the interval
+        self.client.delete(self.config.shard_key)
+        throttler = Throttler(self.config.copy(shard_sync_interval=0))
+        for i in range(2):
+            self.client.zadd(throttler.config.shard_key, {f"node_{i}": time.time()})
+        self.assertEqual(3, throttler.shard.live_nodes)
+        self.assertEqual(3, throttler.shard.limiter.max_requests)
+        self.assertAlmostEqual(0.9, throttler.shard.limiter.interval)
+
+    def test_no_redis_per_call(self):
+        throttler = Throttler(self.config.copy(shard_sync_interval=60))
+        throttler.warmup()
+        with mock.patch.object(self.client, "pipeline") as pipeline:
+            for _ in range(10):
+                self.assertTrue(throttler.try_acquire().allowed)
+            result = throttler.try_acquire()
+        pipeline.assert_not_called()
+        self.assertFalse(result.allowed)
+        self.assertGreater(result.retry_after, 0)
+
+    def test_node_timeout(self):
+        throttler = Throttler(self.config.copy(node_timeout=1))
+        self.client.zadd(throttler.config.shard_key, {"dead": time.time() - 2})
+        self.assertEqual(1, throttler.shard.live_nodes)
+
+    def test_leave(self):
+        first = Throttler(self.config)
+        first.warmup()
+        second = Throttler(self.config)
+        self.assertEqual(2, second.shard.live_nodes)
+        first.shard.leave()
+        time.sleep(0.06)
+        self.assertEqual(1, second.shard.live_nodes)
+
+    def test_sync_failure(self):
+        throttler = Throttler(self.config)
+        throttler.warmup()
+        time.sleep(0.06)
+        with mock.patch.object(self.client, "pipeline", side_effect=ConnectionError):
+            self.assertTrue(throttler.try_acquire().allowed)
+
+    def test_in_flight(self):
+        with self.assertRaises(ConfigError):
+            Throttler(self.config.copy(max_in_flight=1))
+
+    def test_request_log_features(self):
+        for options in (
+            {"priority_shares": {1: 0.2}},
+            {"enable_adaptive_rate": True},
+            {"enable_pacing": True},
+        ):
+            with self.subTest(**options):
+                with self.assertRaises(ConfigError):
+                    Throttler(self.config.copy(**options))
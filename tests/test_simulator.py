@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from benchmarks.simulator import (
+    burst_arrivals,
+    load_trace,
+    main,
+    max_interval_admissions,
+    poisson_arrivals,
+    simulate,
+)
+
+
+class SimulatorTest(unittest.TestCase):
+    def test_arrivals(self):
+        arrivals = poisson_arrivals(100, 10, seed=1)
+        self.assertEqual(arrivals, poisson_arrivals(100, 10, seed=1))
+        self.assertAlmostEqual(1000, len(arrivals), delta=150)
+        self.assertEqual([0, 0, 1], burst_arrivals([(1, 1), (0, 2)]))
+        with tempfile.TemporaryDirectory() as path:
+            trace = os.path.join(path, "trace.txt")
+            with open(trace, "w") as f:
+                f.write("12.5\n10\n\n11\n")
+            self.assertEqual([0, 1, 2.5], load_trace(trace))
+
+    def test_max_interval_admissions(self):
+        self.assertEqual(3, max_interval_admissions([0, 0.5, 0.9, 1.5, 2.6], 1))
+        self.assertEqual(0, max_interval_admissions([], 1))
+
+    def test_burst(self):
+        start = time.monotonic()
+        result = simulate(burst_arrivals([(0, 30)]), "10/s")
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(30, result.admitted)
+        self.assertEqual(0, result.dropped)
+        self.assertEqual(10, result.max_interval_admissions)
+        self.assertGreaterEqual(result.wait_max, 2)
+        self.assertGreater(result.round_trips, 0)
+        self.assertIn("zadd", result.commands)
+
+    def test_max_wait(self):
+        result = simulate(burst_arrivals([(0, 30)]), "10/s", max_wait=0.5)
+        self.assertEqual(10, result.admitted)
+        self.assertEqual(20, result.dropped)
+
+    def test_poisson(self):
+        result = simulate(poisson_arrivals(50, 20), "100/s", algorithm="sliding_window")
+        self.assertEqual(result.arrivals, result.admitted)
+        self.assertEqual(0, result.wait_max)
+        self.assertAlmostEqual(50, result.admitted_rate, delta=10)
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as path:
+            output = os.path.join(path, "simulation.json")
+            main(
+                [
+                    "--duration",
+                    "2",
+                    "--algorithms",
+                    "sliding_window",
+                    "--output",
+                    output,
+                ]
+            )
+            self.assertTrue(os.path.exists(output))
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
+from client_throttler.clock import SimulatedClock
+from tests.mock.api import request_api
+
+
+class StatusTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimulatedClock(start=1_000_000)
+        self.redis_client = InMemoryRedisClient(
+            clock=self.clock.monotonic, wall_clock=self.clock.time
+        )
+        self.config = ThrottlerConfig(
+            func=request_api,
+            key="status",
+            rate="4/10s",
+            redis_client=self.redis_client,
+            clock=self.clock,
+        )
+
+    def test_empty(self):
+        status = Throttler(self.config).status()
+        self.assertEqual(status.key, "status")
+        self.assertEqual(
+            (status.count, status.remaining, status.reset_after), (0, 4, 0)
+        )
+
+    def test_status(self):
+        throttler = Throttler(self.config)
+        throttler.try_acquire()
+        self.clock.advance(2)
+        throttler.try_acquire()
+        throttler.reserve()
+        throttler.reserve()
+        throttler.reserve()
+        status = throttler.status()
+        self.assertEqual(status.count, 4)
+        self.assertEqual(status.remaining, 0)
+        self.assertAlmostEqual(status.reset_after, 8)
+        self.assertEqual(status.queued, 1)
+        self.assertEqual(status.admitting, 0)
+
+    def test_read_only(self):
+        throttler = Throttler(self.config)
+        for _ in range(3):
+            throttler.status()
+        self.assertEqual(throttler.try_acquire().remaining, 3)
+
+    def test_inspect(self):
+        throttler = Throttler(self.config)
+        other = Throttler(self.config.copy(key="other"))
+        for _ in range(3):
+            other.try_acquire()
+        statuses = throttler.inspect(["status", "other", "missing"])
+        self.assertEqual([s.key for s in statuses], ["status", "other", "missing"])
+        self.assertEqual([s.count for s in statuses], [0, 3, 0])
+        self.assertEqual([s.remaining for s in statuses], [4, 1, 4])
+
+    def test_in_flight_and_quota(self):
+        throttler = Throttler(
+            self.config.copy(max_in_flight=2, quota="10/day", lease_timeout=60)
+        )
+        throttler.try_acquire()
+        status = throttler.status()
+        self.assertEqual(status.in_flight, 1)
+        self.assertEqual((status.quota_count, status.quota_remaining), (1, 9))
+        self.assertGreater(status.quota_reset_after, 0)
+
+        quota_only = Throttler(self.config.copy(rate="", quota="10/day"))
+        status = quota_only.status()
+        self.assertEqual((status.count, status.quota_count), (0, 1))
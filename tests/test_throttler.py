@@ -23,13 +23,24 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
+from redis import BlockingConnectionPool, Redis
 from redis.exceptions import ConnectionError
 
-from client_throttler import Throttler, ThrottlerConfig
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig
 from client_throttler.constants import TimeDurationUnit
-from client_throttler.exceptions import RetryTimeout, TooManyRequests, TooManyRetries
+from client_throttler.exceptions import (
+    ConfigError,
+    ConfigFrozenError,
+    ConnectionPoolTooSmall,
+    RetryTimeout,
+    TooManyRequests,
+    TooManyRetries,
+)
+from client_throttler.redis import create_redis_client
 from tests.mock.api import request_api
 from tests.mock.redis import fake_redis_client, redis_client
 
@@ -144,9 +155,12 @@ class ThrottlerTest(unittest.TestCase):
             max_retry_duration=0.01,
             redis_client=redis_client,
         )
-        with self.assertRaises(RetryTimeout):
+        with self.assertRaises(RetryTimeout) as context:
             for _ in range(3):
                 Throttler(config)()
+        # compared on the monotonic clock, reported as timestamps
+        self.assertAlmostEqual(time.time(), context.exception.expect_time, delta=1)
+        self.assertGreater(context.exception.actual_time, context.exception.expect_time)
 
     def test_clean(self):
         config = ThrottlerConfig(func=request_api, redis_client=redis_client)
@@ -237,3 +251,51 @@ class ThrottlerTest(unittest.TestCase):
 
         members = throttler.config.redis_client.get_members(throttler.config.cache_key)
         self.assertNotIn(first_tag, members)
+
+    def test_config_frozen(self):
+        config = ThrottlerConfig(
+            func=request_api, rate="1/50ms", redis_client=redis_client
+        )
+        throttler = Throttler(config)
+        self.assertIsNot(config, throttler.config)
+        self.assertTrue(throttler.config.frozen)
+        self.assertFalse(config.frozen)
+        with self.assertRaises(ConfigFrozenError):
+            throttler.config.rate = "2/s"
+        # the given config is not mixed with default config
+        config.rate = "2/s"
+        Throttler(config)
+
+    def test_config_without_key(self):
+        with self.assertRaises(ConfigError):
+            Throttler(ThrottlerConfig(func=None, rate="1/s", redis_client=redis_client))
+        Throttler(ThrottlerConfig(key="key", rate="1/s", redis_client=redis_client))
+
+    def test_shared_throttler(self):
+        client = InMemoryRedisClient()
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="1000000/s",
+                redis_client=client,
+                expected_concurrency=8,
+            )
+        )
+
+        def call(_):
+            for _ in range(100):
+                throttler()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(call, range(8)))
+        self.assertEqual(800, client.zcard(throttler.config.cache_key))
+
+    def test_connection_pool(self):
+        client = Redis(connection_pool=BlockingConnectionPool(max_connections=2))
+        config = ThrottlerConfig(
+            func=request_api, redis_client=client, expected_concurrency=4
+        )
+        with self.assertRaises(ConnectionPoolTooSmall):
+            Throttler(config)
+        config.redis_client = create_redis_client("redis://localhost:6379/0", 4)
+        Throttler(config)
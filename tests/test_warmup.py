@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+MIT License
+
+Copyright (c) 2023 OVINC-CN
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import unittest
+from unittest import mock
+
+from redis import ConnectionPool
+
+from client_throttler import InMemoryRedisClient, Throttler, ThrottlerConfig, setup
+from client_throttler.configs import default_config
+from client_throttler.redis import get_connection_args, warmup_connections
+from tests.mock.api import request_api
+
+
+class FakeConnectionPool:
+    def __init__(self, max_connections):
+        self.max_connections = max_connections
+        self.created = []
+        self.available = []
+
+    def get_connection(self, command_name, *keys, **options):
+        if self.available:
+            return self.available.pop()
+        connection = mock.Mock()
+        connection.read_response.return_value = b"PONG"
+        self.created.append(connection)
+        return connection
+
+    def release(self, connection):
+        self.available.append(connection)
+
+
+class WarmupTest(unittest.TestCase):
+    def test_warmup_connections(self):
+        client = mock.Mock(connection_pool=FakeConnectionPool(max_connections=4))
+        warmup_connections(client, 3)
+        self.assertEqual(3, len(client.connection_pool.created))
+        self.assertEqual(3, len(client.connection_pool.available))
+        for connection in client.connection_pool.created:
+            connection.send_command.assert_called_once_with("PING")
+
+        # capped by the pool size
+        warmup_connections(client, 10)
+        self.assertEqual(4, len(client.connection_pool.created))
+
+    def test_get_connection_args(self):
+        # redis-py 5.3 deprecates the command name, earlier versions require it
+        self.assertEqual((), get_connection_args(ConnectionPool()))
+        self.assertEqual(("PING",), get_connection_args(FakeConnectionPool(1)))
+
+        class DeprecatedArgsPool(FakeConnectionPool):
+            def get_connection(self, command_name=None, *keys, **options):
+                if command_name is not None:
+                    raise AssertionError("deprecated command_name")
+                return super().get_connection(command_name)
+
+        client = mock.Mock(connection_pool=DeprecatedArgsPool(max_connections=2))
+        warmup_connections(client, 2)
+        self.assertEqual(2, len(client.connection_pool.created))
+
+    def test_warmup_without_pool(self):
+        client = InMemoryRedisClient()
+        with mock.patch.object(client, "ping", wraps=client.ping) as ping:
+            warmup_connections(client)
+        ping.assert_called_once_with()
+
+    def test_throttler_warmup(self):
+        client = InMemoryRedisClient()
+        throttler = Throttler(
+            ThrottlerConfig(
+                func=request_api,
+                rate="10/s",
+                redis_client=client,
+                enable_server_time=True,
+                enable_adaptive_rate=True,
+            )
+        )
+        throttler.warmup()
+        self.assertIsNotNone(throttler.clock._synced_at)
+        self.assertIsNotNone(throttler.adaptive._synced_at)
+        self.assertEqual(10, throttler.max_requests)
+
+    def test_setup_warm(self):
+        client = mock.Mock(connection_pool=FakeConnectionPool(max_connections=8))
+        redis_client = default_config.redis_client
+        try:
+            setup(
+                ThrottlerConfig(redis_client=client, expected_concurrency=2), warm=True
+            )
+            self.assertEqual(2, len(client.connection_pool.created))
+        finally:
+            default_config.redis_client = redis_client
+            default_config.expected_concurrency = ThrottlerConfig().expected_concurrency